@@ -0,0 +1,155 @@
+# ------------------------
+# @file     alignment.py
+# @date     October 2026
+# @author
+# @email
+# @brief    fast initial alignment of shapes using their centroids and principal axes
+# ------------------------
+
+import numpy as np
+from triangles import TriangleMesh
+from spatial_index import SpatialIndex
+from registration import make_transform, apply_transform
+from topology import index_faces, is_closed
+
+# rows converted to float64 at a time
+_BLOCK_SIZE = 1<<16
+
+def mass_properties(triangle_mesh):
+    """
+    Volume, center of gravity and inertia matrix (at the center of gravity) of a closed mesh, computed for all faces
+    in one pass using the polyhedral integrals from Eberly's "Polyhedral Mass Properties". Gives the same values as
+    numpy-stl's get_mass_properties().
+
+    :param triangle_mesh: TriangleMesh or numpy array of shape (m,3,3)
+    :return: volume, center of gravity of shape (3,), 3x3 inertia matrix
+    """
+    vectors = triangle_mesh.vectors if isinstance(triangle_mesh, TriangleMesh) else np.asarray(triangle_mesh)
+    x, y, z = 0, 1, 2
+    volume = 0.0
+    first = np.zeros(3)     # integrals of x, y, z
+    second = np.zeros(3)    # integrals of x^2, y^2, z^2
+    xy = yz = zx = 0.0
+
+    # float64 in blocks of faces so float32 meshes aren't upcast all at once
+    for start in range(0, vectors.shape[0], _BLOCK_SIZE):
+        block = vectors[start:start+_BLOCK_SIZE]
+        v0 = block[:,0].astype(np.float64)
+        v1 = block[:,1].astype(np.float64)
+        v2 = block[:,2].astype(np.float64)
+        d = np.cross(v1-v0, v2-v0)
+
+        # per axis subexpressions, each of shape (m,3)
+        f1 = v0 + v1 + v2
+        f2 = v0*v0 + v0*v1 + v1*v1 + v2*f1
+        f3 = v0*v0*v0 + v0*v0*v1 + v0*v1*v1 + v1*v1*v1 + v2*f2
+        g0 = f2 + v0*(f1+v0)
+        g1 = f2 + v1*(f1+v1)
+        g2 = f2 + v2*(f1+v2)
+
+        volume += np.sum(d[:,x]*f1[:,x])/6
+        first += np.sum(d*f2, axis=0)/24
+        second += np.sum(d*f3, axis=0)/60
+        xy += np.sum(d[:,x]*(v0[:,y]*g0[:,x] + v1[:,y]*g1[:,x] + v2[:,y]*g2[:,x]))/120
+        yz += np.sum(d[:,y]*(v0[:,z]*g0[:,y] + v1[:,z]*g1[:,y] + v2[:,z]*g2[:,y]))/120
+        zx += np.sum(d[:,z]*(v0[:,x]*g0[:,z] + v1[:,x]*g1[:,z] + v2[:,x]*g2[:,z]))/120
+
+    if volume == 0:
+        return 0.0, np.full(3, np.nan), np.full((3,3), np.nan)
+    cog = first/volume
+
+    cx, cy, cz = cog
+    inertia = np.empty((3,3))
+    inertia[0,0] = second[y] + second[z] - volume*(cy*cy + cz*cz)
+    inertia[1,1] = second[z] + second[x] - volume*(cz*cz + cx*cx)
+    inertia[2,2] = second[x] + second[y] - volume*(cx*cx + cy*cy)
+    inertia[0,1] = inertia[1,0] = -(xy - volume*cx*cy)
+    inertia[1,2] = inertia[2,1] = -(yz - volume*cy*cz)
+    inertia[0,2] = inertia[2,0] = -(zx - volume*cz*cx)
+    return volume, cog, inertia
+
+def principal_frame(points=None, triangle_mesh=None, closed=None):
+    """
+    Centroid and principal axes of a shape. Uses the mesh's mass properties when given a closed mesh, otherwise the
+    covariance of the points.
+
+    :param points: numpy array of shape (n,3), defaults to None
+    :param triangle_mesh: TriangleMesh, defaults to None
+    :param closed: whether triangle_mesh is watertight, defaults to None (checked here, see topology.is_closed())
+    :raises Exception: if neither points nor a closed mesh are given
+    :return: centroid of shape (3,) and 3x3 rotation whose columns are the principal axes, largest spread first
+    """
+    volume = 0
+    if triangle_mesh is not None:
+        if closed is None:
+            closed = is_closed(index_faces(triangle_mesh.vectors)[1])
+        if closed:
+            volume, centroid, inertia = mass_properties(triangle_mesh)
+    if abs(volume) > 1e-12:
+        # inertia is smallest around the longest axis, so sort ascending
+        values, axes = np.linalg.eigh(inertia*np.sign(volume))
+        axes = axes[:, np.argsort(values)]
+    elif points is not None:
+        centroid = np.mean(points, axis=0, dtype=np.float64)
+        scatter = np.zeros((3,3))
+        for start in range(0, points.shape[0], _BLOCK_SIZE):
+            centered = points[start:start+_BLOCK_SIZE] - centroid
+            scatter += centered.T @ centered
+        values, axes = np.linalg.eigh(scatter)
+        axes = axes[:, np.argsort(values)[::-1]]
+    else:
+        raise Exception('Need points or a closed mesh to find a principal frame.')
+
+    # make it a rotation instead of a reflection
+    if np.linalg.det(axes) < 0:
+        axes[:,2] *= -1
+    return centroid, axes
+
+# the 4 ways to flip principal axes that keep a right handed frame
+_AXIS_FLIPS = np.array([np.diag(d) for d in ([1,1,1], [1,-1,-1], [-1,1,-1], [-1,-1,1])], np.float64)
+
+def initial_alignment(source_points, target, source_mesh=None, target_mesh=None, samples=2000, seed=0,
+                      source_closed=None, target_closed=None):
+    """
+    Rough rigid transform that moves the source onto the target by lining up their centroids and principal axes. The
+    axes are only known up to sign, so all 4 right handed choices (plus leaving the pose alone) are tried in one batched
+    nearest neighbor query and the one with the smallest mean distance is kept. Linear in the number of points.
+
+    :param source_points: numpy array of shape (n,3)
+    :param target: numpy array of shape (m,3) or a SpatialIndex built over it
+    :param source_mesh: TriangleMesh of the source, used if both meshes are closed, defaults to None (point covariance)
+    :param target_mesh: TriangleMesh of the target, used if both meshes are closed, defaults to None (point covariance)
+    :param samples: source points used to score each candidate, defaults to 2000
+    :param seed: random seed for picking those points, defaults to 0
+    :param source_closed: whether source_mesh is watertight, defaults to None (checked here, see topology.is_closed())
+    :param target_closed: whether target_mesh is watertight, defaults to None (checked here, see topology.is_closed())
+    :return: 4x4 transformation matrix
+    """
+    if not isinstance(target, SpatialIndex):
+        target = SpatialIndex(target)
+
+    # inertia axes and point covariance axes don't line up, so both sides use mass properties or neither does
+    if source_mesh is None or target_mesh is None:
+        use_mass = False
+    else:
+        if source_closed is None:
+            source_closed = is_closed(index_faces(source_mesh.vectors)[1])
+        if target_closed is None and source_closed:
+            target_closed = is_closed(index_faces(target_mesh.vectors)[1])
+        use_mass = bool(source_closed and target_closed)
+
+    source_centroid, source_axes = principal_frame(source_points, source_mesh if use_mass else None, use_mass)
+    target_centroid, target_axes = principal_frame(target.points, target_mesh if use_mass else None, use_mass)
+
+    candidates = [np.eye(4)]
+    for flip in _AXIS_FLIPS:
+        rotation = target_axes @ flip @ source_axes.T
+        candidates.append(make_transform(rotation, target_centroid - rotation @ source_centroid))
+
+    rng = np.random.default_rng(seed)
+    if source_points.shape[0] > samples:
+        source_points = source_points[rng.choice(source_points.shape[0], samples, replace=False)]
+
+    moved = np.concatenate([apply_transform(source_points, transform) for transform in candidates])
+    dist = target.nearest_distances(moved).reshape(len(candidates), -1)
+    return candidates[int(np.argmin(np.mean(dist, axis=1)))]
@@ -0,0 +1,146 @@
+# ------------------------
+# @file     batch_compare.py
+# @date     October 2026
+# @author
+# @email
+# @brief    compare one reference model against many candidates with a process pool
+# ------------------------
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from shape import Shape
+from triangles import TriangleMesh
+from metrics import nearest_distances, deviation_percentiles
+
+# set in each worker by _init_worker()
+_reference = None
+_reference_memory = []
+
+def _share(array):
+    """
+    Copy an array into a new shared memory block.
+
+    :param array: numpy array
+    :return: SharedMemory (close and unlink it when done), and (name, shape, dtype) to attach to it with
+    """
+    array = np.ascontiguousarray(array)
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=memory.buf)[...] = array
+    return memory, (memory.name, array.shape, array.dtype)
+
+def _attach(name, shape, dtype):
+    memory = shared_memory.SharedMemory(name=name)
+    _reference_memory.append(memory)   # keep the block open as long as the worker uses it
+    return np.ndarray(shape, dtype, buffer=memory.buf)
+
+def _init_worker(cloud_spec, faces_spec):
+    """
+    Attach to the reference point cloud and face vectors in shared memory. Runs once per worker, so the reference's
+    spatial index and face properties are built once per worker and reused for every candidate it compares. The
+    faces are needed so initial_alignment() uses the same mass property frame as it would in a single process.
+    """
+    global _reference
+    faces = None if faces_spec is None else TriangleMesh(_attach(*faces_spec))
+    _reference = Shape.from_point_cloud(_attach(*cloud_spec), faces, verbose=False)
+
+def compare_to_reference(candidate, reference, threshhold=.005, levels=3):
+    """
+    Registers a candidate to the reference and scores how close every candidate point lands to the reference.
+
+    :param candidate: Shape to compare
+    :param reference: reference Shape
+    :param threshhold: distance a point has to be within to count as a match, defaults to .005
+    :param levels: pyramid levels used for registration, defaults to 3
+    :return: dict summary of the comparison
+    """
+    result = candidate.register(reference, levels=levels)
+    moved = result.apply(candidate.point_cloud)
+    dist = nearest_distances(moved, reference, workers=1)
+
+    return {
+        'points': int(candidate.point_cloud.shape[0]),
+        'rmse': float(result.rmse),
+        'mean_distance': float(np.mean(dist)),
+        'max_distance': float(np.max(dist)),
+        'percentiles': deviation_percentiles(dist),
+        'chamfer': float(np.mean(dist) + np.mean(nearest_distances(reference, moved, workers=1))),
+        'score': float(np.count_nonzero(dist <= threshhold)/dist.shape[0]),
+        'iterations': int(result.iterations),
+        'converged': bool(result.converged),
+        'transform': result.transform.tolist(),
+    }
+
+def _compare_candidate(candidate_file, threshhold, levels):
+    start = time.perf_counter()
+    try:
+        summary = compare_to_reference(Shape(candidate_file, verbose=False), _reference, threshhold, levels)
+        summary['error'] = None
+    except Exception as e:
+        summary = {'error': f'{type(e).__name__}: {e}'}
+    summary['candidate'] = candidate_file
+    summary['seconds'] = time.perf_counter()-start
+    return summary
+
+def compare_batch(reference_file, candidate_files, workers=None, threshhold=.005, levels=3):
+    """
+    Compares one reference model against many candidates. The reference is loaded once and its point cloud and face
+    vectors are shared with the worker processes through shared memory. Candidates are loaded and compared in
+    parallel, and results are yielded as soon as each one finishes (not in the order given).
+
+    :param reference_file: string location of the reference stl file
+    :param candidate_files: list of candidate stl file locations
+    :param workers: number of processes, defaults to None (one per core)
+    :param threshhold: distance a point has to be within to count as a match, defaults to .005
+    :param levels: pyramid levels used for registration, defaults to 3
+    :yield: dict summary for each candidate, with 'error' set if it failed
+    """
+    reference = Shape(reference_file, verbose=False)
+    memories = []
+    try:
+        memory, cloud_spec = _share(reference.point_cloud)
+        memories.append(memory)
+        faces_spec = None
+        if reference.faces is not None:
+            memory, faces_spec = _share(reference.faces.vectors)
+            memories.append(memory)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cloud_spec, faces_spec)) as pool:
+            futures = [pool.submit(_compare_candidate, candidate, threshhold, levels) for candidate in candidate_files]
+            for future in as_completed(futures):
+                summary = future.result()
+                summary['reference'] = reference_file
+                yield summary
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare a reference stl against many candidate stls.')
+    parser.add_argument('reference', help='reference stl file')
+    parser.add_argument('candidates', nargs='+', help='candidate stl files')
+    parser.add_argument('-o', '--output', help='write one json summary per line to this file (default stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of processes (default one per core)')
+    parser.add_argument('-t', '--threshhold', type=float, default=.005, help='match distance (default .005)')
+    parser.add_argument('--levels', type=int, default=3, help='registration pyramid levels (default 3)')
+    args = parser.parse_args()
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        for summary in compare_batch(args.reference, args.candidates, args.workers, args.threshhold, args.levels):
+            out.write(json.dumps(summary) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f'compared {len(args.candidates)} candidates in {time.perf_counter()-start:.2f}s using {args.workers or os.cpu_count()} workers', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
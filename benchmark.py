@@ -0,0 +1,213 @@
+# ------------------------
+# @file     benchmark.py
+# @date     October 2026
+# @author
+# @email
+# @brief    reproducible benchmarks of loading, dedup, registration and comparison on synthetic models
+# ------------------------
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+from shape import Shape
+from registration import apply_transform
+from synthetic_stl import generate_case
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+COMPARISONS = ['nearest_distance', 'compare_shapes', 'compare_with_procrustes', 'compare_point_clouds']
+# reference run checked into the repo, compared against with --baseline
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json')
+
+def measure(func, track_memory=True):
+    """
+    Runs a function once and measures its wall time and peak memory allocated while it ran.
+
+    :param func: function with no arguments
+    :param track_memory: whether to measure peak memory with tracemalloc (slows things down a little), defaults to True
+    :return: return value of func, seconds taken, peak bytes (None if not tracked)
+    """
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        value = func()
+    finally:
+        seconds = time.perf_counter()-start
+        peak = None
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return value, seconds, peak
+
+def load_stage(stl_file):
+    # the same path as Shape(stl_file) without the cache: read the faces and weld the vertices
+    shape = Shape(None, cache=False, verbose=False)
+    shape.open_stl_file(stl_file)
+    return shape
+
+def dedup_stage(shape):
+    # weld the face corners again on a copy without the indexed mesh, see topology.weld_vertices()
+    copy = Shape.from_point_cloud(shape.point_cloud, shape.faces, verbose=False)
+    return copy.get_indexed_mesh()
+
+def alignment_error(registration_transform, applied_transform, points):
+    """
+    How far a registration is from undoing a known transform, measured on the points it was applied to.
+
+    :param registration_transform: 4x4 transform found by registration, taking the moved points back
+    :param applied_transform: 4x4 transform that was applied to the points
+    :param points: numpy array of shape (n,3) of the original points
+    :return: rotation error in degrees, rms distance of the points from where they started
+    """
+    residual = registration_transform @ applied_transform
+    cos_angle = np.clip((np.trace(residual[:3,:3])-1)/2, -1, 1)
+    moved = apply_transform(points, residual)
+    rms = np.sqrt(np.mean(np.sum((moved-points)**2, axis=1)))
+    return float(np.degrees(np.arccos(cos_angle))), float(rms)
+
+def run_size(n_faces, folder, methods, seed=0, track_memory=True):
+    """
+    Benchmarks every stage on one generated model pair.
+
+    :param n_faces: number of triangles in the generated models
+    :param folder: folder to write the generated stl files to
+    :param methods: comparison methods to run, from COMPARISONS
+    :param seed: random seed, defaults to 0
+    :param track_memory: whether to measure peak memory, defaults to True
+    :return: list of result dicts, one per stage
+    """
+    reference_file = os.path.join(folder, f'reference_{n_faces}.stl')
+    candidate_file = os.path.join(folder, f'candidate_{n_faces}.stl')
+    case = generate_case(reference_file, candidate_file, n_faces, seed=seed, noise=.001)
+
+    results = []
+    def record(stage, func):
+        try:
+            value, seconds, peak = measure(func, track_memory)
+            error = None
+        except Exception as e:
+            value, seconds, peak, error = None, None, None, f'{type(e).__name__}: {e}'
+        results.append({'faces': case['faces'], 'stage': stage, 'seconds': seconds, 'peak_bytes': peak, 'error': error})
+        shown = 'failed' if error else f'{seconds:.4f}s'
+        print(f'  {stage:<24} {shown}' + (f' peak {peak/1024**2:.1f}MB' if peak else ''))
+        return value
+
+    reference = record('load', lambda: load_stage(reference_file))
+    candidate = load_stage(candidate_file)
+    record('dedup', lambda: dedup_stage(reference))
+    record('spatial_index', reference.get_spatial_index)
+
+    registration = record('registration', lambda: candidate.register(reference))
+    if registration is not None:
+        # the candidate is the reference moved by case['transform'], so registration should undo it
+        rotation_error, rms_error = alignment_error(registration.transform, np.asarray(case['transform']),
+                                                    reference.point_cloud)
+        results.append({'faces': case['faces'], 'stage': 'accuracy', 'seconds': None, 'peak_bytes': None,
+                        'error': None, 'rotation_error_deg': rotation_error, 'rms_error': rms_error})
+        print(f"  {'accuracy':<24} rotation {rotation_error:.4f} deg, rms {rms_error:.6f}")
+        candidate = Shape.from_point_cloud(registration.apply(candidate.point_cloud), candidate.faces, verbose=False)
+
+    comparisons = {
+        'nearest_distance': lambda: reference.get_spatial_index().nearest_distances(candidate.point_cloud),
+        'compare_shapes': lambda: reference.compare_shapes(candidate, .01),
+        'compare_with_procrustes': lambda: candidate.compare_with_procrustes(reference),
+        'compare_point_clouds': lambda: candidate.compare_point_clouds(reference),
+    }
+    for method in methods:
+        record(method, comparisons[method])
+    return results
+
+def check_accuracy(results, max_rotation_error, max_rms_error):
+    """
+    Finds registrations that didn't recover the transform applied to the candidate, so a speedup that breaks
+    registration fails the benchmark instead of looking like a win.
+
+    :param results: list of result dicts from this run
+    :param max_rotation_error: allowed rotation error in degrees
+    :param max_rms_error: allowed rms distance of the reference points after undoing the transform
+    :return: list of (faces, rotation error, rms error)
+    """
+    failures = []
+    for r in results:
+        if r['stage'] == 'accuracy' and (r['rotation_error_deg'] > max_rotation_error or r['rms_error'] > max_rms_error):
+            failures.append((r['faces'], r['rotation_error_deg'], r['rms_error']))
+    return failures
+
+def compare_to_baseline(results, baseline, tolerance, min_seconds=.05):
+    """
+    Finds stages that got slower than the baseline by more than tolerance. Slowdowns under min_seconds are timer noise
+    on the small models and are not counted.
+
+    :param results: list of result dicts from this run
+    :param baseline: list of result dicts from the baseline run
+    :param tolerance: allowed slowdown as a fraction, like .2 for 20%
+    :param min_seconds: allowed slowdown in seconds whatever the fraction, defaults to .05
+    :return: list of (faces, stage, baseline seconds, new seconds)
+    """
+    base = {(r['faces'], r['stage']): r['seconds'] for r in baseline}
+    regressions = []
+    for r in results:
+        before = base.get((r['faces'], r['stage']))
+        if before and r['seconds'] is not None and r['seconds'] > max(before*(1+tolerance), before+min_seconds):
+            regressions.append((r['faces'], r['stage'], before, r['seconds']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark loading, dedup, registration and comparison on synthetic models.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='face counts to generate')
+    parser.add_argument('--methods', nargs='+', default=COMPARISONS, choices=COMPARISONS, help='comparison methods to run')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+    parser.add_argument('--no-memory', action='store_true', help="don't track peak memory")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='json file to write (default benchmark_results.json)')
+    parser.add_argument('--baseline', nargs='?', const=BASELINE_FILE,
+                        help='json file from an earlier run to check for regressions (default benchmarks/baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true', help='also write the results to benchmarks/baseline.json')
+    parser.add_argument('--tolerance', type=float, default=.2, help='allowed slowdown vs the baseline (default .2)')
+    parser.add_argument('--min-seconds', type=float, default=.05, help='allowed slowdown in seconds vs the baseline (default .05)')
+    parser.add_argument('--max-rotation-error', type=float, default=.1, help='allowed registration rotation error in degrees (default .1)')
+    parser.add_argument('--max-rms-error', type=float, default=.05, help='allowed registration rms error (default .05)')
+    parser.add_argument('--folder', help='where to write generated stl files (default a temporary folder)')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.folder or tmp
+        for n_faces in args.sizes:
+            print(f'{n_faces} faces')
+            results.extend(run_size(n_faces, folder, args.methods, args.seed, not args.no_memory))
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'results': results,
+    }
+    outputs = [args.output, BASELINE_FILE] if args.update_baseline else [args.output]
+    for output in outputs:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'results written to {output}')
+
+    failed = False
+    for faces, rotation_error, rms_error in check_accuracy(results, args.max_rotation_error, args.max_rms_error):
+        print(f'INACCURATE registration at {faces} faces: rotation {rotation_error:.4f} deg, rms {rms_error:.6f}')
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f)['results'], args.tolerance, args.min_seconds)
+        for faces, stage, before, after in regressions:
+            print(f'REGRESSION {stage} at {faces} faces: {before:.4f}s -> {after:.4f}s')
+        failed = failed or bool(regressions)
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+# ------------------------
+# @file     bvh.py
+# @date     October 2026
+# @author
+# @email
+# @brief    bounding volume hierarchy over mesh faces for exact point to surface distances
+# ------------------------
+
+import numpy as np
+from triangles import TriangleMesh, closest_points_on_triangles, points_to_triangles
+from topology import index_faces, face_edges
+
+def _morton_codes(points, bits=10):
+    """
+    Interleaves the bits of quantized x, y, z so that sorting by the code keeps nearby points together.
+
+    :param points: numpy array of shape (n,3)
+    :param bits: bits per axis, defaults to 10
+    :return: uint64 codes of shape (n,)
+    """
+    low = np.min(points, axis=0)
+    extent = np.max(points, axis=0) - low
+    extent[extent == 0] = 1
+    cells = ((points-low)/extent*((1 << bits)-1)).astype(np.uint64)
+
+    codes = np.zeros(points.shape[0], np.uint64)
+    for bit in range(bits):
+        for axis in range(3):
+            codes |= ((cells[:,axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3*bit+axis)
+    return codes
+
+class BVH:
+    def __init__(self, triangles, leaf_size=8):
+        """
+        Bounding volume hierarchy over the faces of a mesh, stored as flat arrays. Faces are sorted along a Morton
+        curve and grouped leaf_size at a time into leaves, and the leaves are the bottom of a complete binary tree
+        stored like a heap (children of node i are 2i+1 and 2i+2). Building is a sort plus one vectorized pass
+        per tree level.
+
+        :param triangles: TriangleMesh or numpy array of shape (m,3,3)
+        :param leaf_size: faces per leaf, defaults to 8
+        """
+        if not isinstance(triangles, TriangleMesh):
+            triangles = TriangleMesh(triangles)
+        self.mesh = triangles
+        self.leaf_size = leaf_size
+        self._normals = None    # pseudonormals for signed_distances(), built on demand
+
+        m = len(triangles)
+        # face order, leaf k holds order[k*leaf_size:(k+1)*leaf_size]
+        self.order = np.argsort(_morton_codes(triangles.centroids), kind='stable')
+
+        n_leaves = max(1, -(-m//leaf_size))
+        self.n_leaves = 1 << int(np.ceil(np.log2(n_leaves)))
+        self.first_leaf = self.n_leaves-1
+        n_nodes = 2*self.n_leaves-1
+
+        # empty nodes get an inverted box, which is infinitely far from everything
+        self.bbox_min = np.full((n_nodes, 3), np.inf)
+        self.bbox_max = np.full((n_nodes, 3), -np.inf)
+
+        if m > 0:
+            sorted_vectors = triangles.vectors[self.order]
+            face_min = np.min(sorted_vectors, axis=1)
+            face_max = np.max(sorted_vectors, axis=1)
+            starts = np.arange(0, m, leaf_size)
+            leaves = self.first_leaf + np.arange(starts.shape[0])
+            self.bbox_min[leaves] = np.minimum.reduceat(face_min, starts, axis=0)
+            self.bbox_max[leaves] = np.maximum.reduceat(face_max, starts, axis=0)
+
+        # fill in the tree from the bottom up, one level at a time
+        level_start = self.first_leaf
+        while level_start > 0:
+            parents = np.arange((level_start-1)//2, level_start)
+            self.bbox_min[parents] = np.minimum(self.bbox_min[2*parents+1], self.bbox_min[2*parents+2])
+            self.bbox_max[parents] = np.maximum(self.bbox_max[2*parents+1], self.bbox_max[2*parents+2])
+            level_start = parents[0]
+
+    def __len__(self):
+        return len(self.mesh)
+
+    def _box_distance_squared(self, points, nodes):
+        clamped = np.clip(points, self.bbox_min[nodes], self.bbox_max[nodes])
+        diff = points-clamped
+        dist = np.einsum('ij,ij->i', diff, diff)
+        # empty nodes
+        dist[np.isinf(self.bbox_min[nodes,0])] = np.inf
+        return dist
+
+    def closest_points(self, points, chunk_size=4096):
+        """
+        Finds the closest point on the mesh surface for every query point. Queries start with an upper bound from the
+        face with the nearest centroid, then walk the tree breadth first for all points at once, skipping any node whose
+        box is further away than the best face found so far.
+
+        :param points: numpy array of shape (n,3)
+        :param chunk_size: points walked through the tree at once, defaults to 4096
+        :return: distances of shape (n,), closest face indices of shape (n,), closest points of shape (n,3)
+        """
+        points = np.asarray(points, np.float64)
+        n = points.shape[0]
+        distances = np.full(n, np.inf)
+        faces = np.full(n, -1, np.intp)
+        if n == 0 or len(self.mesh) == 0:
+            return distances, faces, np.full((n, 3), np.nan)
+
+        # upper bound from the face with the nearest centroid
+        _, nearest_centroid = self.mesh.get_centroid_index().nearest(points)
+        distances, faces, _ = points_to_triangles(points, self.mesh, nearest_centroid[:,None])
+        best = distances**2
+
+        vectors = self.mesh.vectors
+        m = len(self.mesh)
+        slots = np.arange(self.leaf_size)
+        for start in range(0, n, chunk_size):
+            pts = np.arange(start, min(start+chunk_size, n))
+            nodes = np.zeros(pts.shape[0], np.intp)
+            while pts.shape[0] > 0:
+                near = self._box_distance_squared(points[pts], nodes) < best[pts]
+                pts = pts[near]
+                nodes = nodes[near]
+
+                # check the faces in leaves
+                is_leaf = nodes >= self.first_leaf
+                leaf_pts = pts[is_leaf]
+                if leaf_pts.shape[0] > 0:
+                    sorted_face = ((nodes[is_leaf]-self.first_leaf)*self.leaf_size)[:,None] + slots
+                    valid = sorted_face < m
+                    pair_pts = np.broadcast_to(leaf_pts[:,None], sorted_face.shape)[valid]
+                    pair_faces = self.order[sorted_face[valid]]
+
+                    closest, _ = closest_points_on_triangles(points[pair_pts], vectors[pair_faces])
+                    diff = closest-points[pair_pts]
+                    dist = np.einsum('ij,ij->i', diff, diff)
+
+                    better = dist < best[pair_pts]
+                    pair_pts, pair_faces, dist = pair_pts[better], pair_faces[better], dist[better]
+                    # keep only the nearest face of each point, so every point is written once
+                    order = np.lexsort((dist, pair_pts))
+                    first = np.ones(order.shape[0], bool)
+                    first[1:] = pair_pts[order[1:]] != pair_pts[order[:-1]]
+                    keep = order[first]
+                    best[pair_pts[keep]] = dist[keep]
+                    faces[pair_pts[keep]] = pair_faces[keep]
+
+                # go down a level on everything else
+                inner = ~is_leaf
+                pts = np.repeat(pts[inner], 2)
+                nodes = (2*np.repeat(nodes[inner], 2)+1) + np.tile([0, 1], np.count_nonzero(inner))
+
+        closest, _ = closest_points_on_triangles(points, vectors[faces])
+        diff = points-closest
+        distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        return distances, faces, closest
+
+    def _pseudonormals(self):
+        """
+        Angle weighted vertex normals and edge normals (sum of the normals of the faces on the edge), built once from
+        the welded mesh. Unlike a single face normal, these give the right inside/outside sign when the closest point
+        is on an edge or a vertex (Baerentzen and Aanaes, "Signed distance computation using the angle weighted
+        pseudonormal").
+
+        :return: vertex of every face corner (m,3), vertex normals, edge of every face edge (m,3), edge normals
+        """
+        if self._normals is None:
+            _, corners = index_faces(self.mesh.vectors)
+            normals = np.asarray(self.mesh.normals, np.float64)
+            vectors = np.asarray(self.mesh.vectors, np.float64)
+            n_vertices = np.max(corners)+1 if corners.size else 0
+
+            # angle of every face at each of its corners
+            e1 = np.roll(vectors, -1, axis=1) - vectors
+            e2 = np.roll(vectors, -2, axis=1) - vectors
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cos = np.einsum('ijk,ijk->ij', e1, e2)/(np.linalg.norm(e1, axis=2)*np.linalg.norm(e2, axis=2))
+            angles = np.arccos(np.clip(np.nan_to_num(cos), -1, 1))
+
+            vertex_normals = np.empty((n_vertices, 3))
+            for axis in range(3):
+                vertex_normals[:,axis] = np.bincount(corners.ravel(), weights=(angles*normals[:,axis,None]).ravel(),
+                                                     minlength=n_vertices)
+
+            # edge k of a face runs from corner k to corner k+1, see topology.face_edges()
+            _, edges = np.unique(face_edges(corners), return_inverse=True)
+            edges = edges.reshape(-1, 3)
+            n_edges = np.max(edges)+1 if edges.size else 0
+            edge_normals = np.empty((n_edges, 3))
+            for axis in range(3):
+                edge_normals[:,axis] = np.bincount(edges.ravel(), weights=np.repeat(normals[:,axis], 3),
+                                                   minlength=n_edges)
+            self._normals = (corners, vertex_normals, edges, edge_normals)
+        return self._normals
+
+    def signed_distances(self, points, chunk_size=4096):
+        """
+        Distance to the surface, negative inside a closed, outward facing mesh. The sign is taken against the
+        pseudonormal of the feature the closest point is on: the face normal inside a face, the edge normal on an
+        edge and the angle weighted vertex normal on a vertex, which is correct at sharp edges and corners too.
+
+        :param points: numpy array of shape (n,3)
+        :param chunk_size: points walked through the tree at once, defaults to 4096
+        :return: signed distances of shape (n,), closest face indices of shape (n,)
+        """
+        points = np.asarray(points, np.float64)
+        distances, faces, closest = self.closest_points(points, chunk_size)
+        if points.shape[0] == 0 or len(self.mesh) == 0:
+            return distances, faces
+        corners, vertex_normals, edges, edge_normals = self._pseudonormals()
+
+        # barycentric coordinates are exactly 0 away from the feature the closest point is on
+        _, bary = closest_points_on_triangles(points, self.mesh.vectors[faces])
+        zeros = np.count_nonzero(bary == 0, axis=1)
+        normal = np.asarray(self.mesh.normals[faces], np.float64)
+
+        on_vertex = zeros == 2
+        corner = np.argmax(bary[on_vertex], axis=1)
+        normal[on_vertex] = vertex_normals[corners[faces[on_vertex], corner]]
+
+        # the edge opposite the corner with a 0 coordinate runs from corner k+1 to k+2, which is edge k+1
+        on_edge = zeros == 1
+        opposite = np.argmin(bary[on_edge], axis=1)
+        normal[on_edge] = edge_normals[edges[faces[on_edge], (opposite+1) % 3]]
+
+        side = np.einsum('ij,ij->i', points-closest, normal)
+        return np.where(side < 0, -distances, distances), faces
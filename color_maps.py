@@ -0,0 +1,66 @@
+# ------------------------
+# @file     color_maps.py
+# @date     October 2026
+# @author
+# @email
+# @brief    match/no match color palette for comparison results, shared by the panda3d viewer and the png renderer
+# ------------------------
+
+import numpy as np
+
+# RGBA colors for the model being checked
+ORIG_COLORS = {
+    'no_match': (1, .5, 0, 3),         # orange
+    'approx_match': (.75, .75, .5, 3), # light green
+    'match': (0, 0, 1, 3),             # blue
+}
+
+# RGBA colors for the reference model
+OTHER_COLORS = {
+    'no_match': (1, 0, 0, 3),           # red
+    'approx_match': (.72, .62, .32, 3), # light brown
+    'match': (0, 1, 0, 3),              # green
+}
+
+def match_colors(n, indices_of_approx_match, indices_of_match, palette=ORIG_COLORS):
+    """
+    Color every point by how well it matched. A point is drawn as a match if it is in indices_of_match, otherwise as an
+    approximate match if it is in indices_of_approx_match, otherwise as no match.
+
+    :param n: number of points
+    :param indices_of_approx_match: boolean mask or indices of approximately matched points
+    :param indices_of_match: boolean mask of matched points
+    :param palette: dict of RGBA colors, defaults to ORIG_COLORS
+    :return: float32 array of shape (n,4)
+    """
+    colors = np.ones((n, 4), np.float32)
+    indices_of_no_match = np.invert(indices_of_match)
+    colors[indices_of_no_match,:] = palette['no_match']
+    colors[indices_of_approx_match,:] = palette['approx_match']
+    colors[indices_of_match,:] = palette['match']
+    return colors
+
+def deviation_colors(distances, match_distance=.001, approx_distance=.01, palette=ORIG_COLORS):
+    """
+    Color points by their deviation from another model, with the same palette as create_color_arrays().
+
+    :param distances: deviation of every point of shape (n,)
+    :param match_distance: max deviation drawn as a match, defaults to .001
+    :param approx_distance: max deviation drawn as an approximate match, defaults to .01
+    :param palette: dict of RGBA colors, defaults to ORIG_COLORS
+    :return: float32 array of shape (n,4)
+    """
+    distances = np.abs(distances)
+    return match_colors(distances.shape[0], distances <= approx_distance, distances <= match_distance, palette)
+
+def create_color_arrays(orig_array, other_array, indices_of_approx_match, indices_of_match):
+    # create color array for display
+    colors_of_orig = match_colors(orig_array.shape[0], indices_of_approx_match, indices_of_match, ORIG_COLORS)
+
+    # color array for other shape
+    colors_of_other = match_colors(other_array.shape[0], indices_of_approx_match, indices_of_match, OTHER_COLORS)
+
+    shape = np.vstack((other_array, orig_array))
+    all_colors = np.vstack((colors_of_other, colors_of_orig))
+
+    return shape, all_colors, colors_of_orig, colors_of_other
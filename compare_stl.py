@@ -3,6 +3,8 @@ from stl import mesh
 from mpl_toolkits import mplot3d
 from matplotlib import pyplot as plt
 import numpy as np
+from vertex_sets import count_shared_vertices
+from topology import weld_vertices
 
 def open_stl_model(model_file):
     model_mesh = mesh.Mesh.from_file(model_file)
@@ -38,14 +40,9 @@ def isVertexInList(vert, vertList:np.array):
             return i
     return -1
 
-def get_list_of_vertices(vectors):
-    vert_list = np.copy(vectors)
-
-    # reshape to get a single list of all vertices
-    vert_list = np.reshape(vert_list, (vert_list.shape[0]*vert_list.shape[1], 3))
-
-    # remove duplicates
-    vert_list = np.unique(vert_list, axis=0)
+def get_list_of_vertices(vectors, eps=None):
+    # remove duplicates with a hash table, see topology.weld_vertices
+    vert_list, _ = weld_vertices(vectors, eps)
 
     return vert_list
 
@@ -76,19 +73,9 @@ def compare_models_match_percentage(model1, model2):
     return score
 
 def count_duplicates_list(v1_list, v2_list):
-    v1_list = v1_list.tolist()
-    v2_list = v2_list.tolist()
     print('counting shared vertices...')
-    total_verts = 0
-    dup_verts = 0
-
-    for vert in v1_list:
-        total_verts += 1
-        print(f'vertices compared: {total_verts}')
-        if vert in v2_list:
-            dup_verts += 1
-            v2_list.remove(vert)
-    total_verts += len(v2_list)
+    # each vertex in v2 can only be matched once, same as removing it from the list when found
+    dup_verts, total_verts = count_shared_vertices(v1_list, v2_list, multiset=True)
 
     print(f'\ndup verts: {dup_verts} total verts: {total_verts}')
     match = dup_verts/total_verts * 100
@@ -98,17 +85,7 @@ def count_duplicates_list(v1_list, v2_list):
 
 def count_duplicates_numpy(v1_list, v2_list):
     print('counting shared vertices...')
-    total_verts = 0
-    dup_verts = 0
-
-    for vert in v1_list:
-        total_verts += 1
-        if (vert==v2_list).all(1).any():
-            dup_verts += 1
-    print('duplicates counted in model 1')
-    for vert in v2_list:
-        if not (vert==v1_list).all(1).any():
-            total_verts += 1
+    dup_verts, total_verts = count_shared_vertices(v1_list, v2_list)
 
     print(f'\ndup verts: {dup_verts} total verts: {total_verts}')
     match = dup_verts/total_verts * 100
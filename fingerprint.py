@@ -0,0 +1,125 @@
+# ------------------------
+# @file     fingerprint.py
+# @date     October 2026
+# @author
+# @email
+# @brief    compact global shape descriptors for ruling out clearly different models before a full comparison
+# ------------------------
+
+import numpy as np
+from triangles import TriangleMesh
+from sampling import sample_surface
+from alignment import mass_properties, principal_frame
+
+# bump when the descriptor changes so cached fingerprints are recomputed
+FINGERPRINT_VERSION = 2
+
+# fingerprint distance below which two models are worth a full comparison
+DEFAULT_THRESHOLD = .2
+
+class Fingerprint:
+    def __init__(self, area, volume, extents, moments, d2, scale):
+        """
+        Global descriptors of a model. Everything except area, volume and scale is invariant to rotation, translation
+        and uniform scaling. Usually made with compute_fingerprint().
+
+        :param area: surface area
+        :param volume: enclosed volume (only meaningful for closed meshes)
+        :param extents: size along each principal axis, largest first, shape (3,)
+        :param moments: eigenvalues of the surface point covariance, largest first, shape (3,)
+        :param d2: D2 shape distribution, histogram of distances between random surface points divided by their mean
+        :param scale: mean distance between random surface points
+        """
+        self.version = FINGERPRINT_VERSION
+        self.area = float(area)
+        self.volume = float(volume)
+        self.extents = np.asarray(extents, np.float64)
+        self.moments = np.asarray(moments, np.float64)
+        self.d2 = np.asarray(d2, np.float64)
+        self.scale = float(scale)
+
+    def to_arrays(self):
+        """
+        :return: dict of name -> array, to store without pickle (see ShapeCache.store_arrays())
+        """
+        return {'version': np.array(self.version), 'area': np.array(self.area), 'volume': np.array(self.volume),
+                'extents': self.extents, 'moments': self.moments, 'd2': self.d2, 'scale': np.array(self.scale)}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a fingerprint saved with to_arrays().
+
+        :param arrays: dict of name -> array
+        :return: Fingerprint, with the version it was saved with
+        """
+        fingerprint = cls(arrays['area'], arrays['volume'], arrays['extents'], arrays['moments'], arrays['d2'],
+                          arrays['scale'])
+        fingerprint.version = int(arrays['version'])
+        return fingerprint
+
+    def vector(self):
+        """
+        Descriptors as one flat vector, scaled so a plain euclidean distance between two vectors is meaningful. Size
+        terms are logs (differences are relative), and the histogram is square rooted (distances are Hellinger
+        distances).
+
+        :return: numpy array of shape (7+bins,)
+        """
+        tiny = 1e-12
+        # isoperimetric quotient, 1 for a sphere and smaller for anything else
+        compactness = 36*np.pi*self.volume**2/max(self.area**3, tiny)
+        return np.concatenate([
+            [np.log(max(self.area, tiny)), np.log(max(self.scale, tiny)), np.sqrt(min(compactness, 1))],
+            np.log(np.maximum(self.extents[1:], tiny)/max(self.extents[0], tiny)),
+            np.log(np.maximum(self.moments[1:], tiny)/max(self.moments[0], tiny))/2,
+            np.sqrt(self.d2),
+        ])
+
+    def distance(self, other):
+        """
+        :param other: Fingerprint to compare to
+        :return: euclidean distance between the descriptor vectors, 0 for identical models
+        """
+        return float(np.linalg.norm(self.vector()-other.vector()))
+
+    def __str__(self):
+        return (f'area: {self.area:.4f} volume: {self.volume:.4f} extents: {np.round(self.extents, 4)} '
+                f'scale: {self.scale:.4f}')
+
+def compute_fingerprint(triangle_mesh, n_pairs=20_000, bins=32, max_ratio=3, seed=0, closed=None):
+    """
+    Computes the descriptors of a mesh. Costs one pass over the faces plus n_pairs sampled point pairs, so it is cheap
+    next to any registration.
+
+    :param triangle_mesh: TriangleMesh (or (m,3,3) array)
+    :param n_pairs: random point pairs for the D2 histogram, defaults to 20,000
+    :param bins: D2 histogram bins, defaults to 32
+    :param max_ratio: D2 histogram range, as a multiple of the mean distance, defaults to 3
+    :param seed: random seed, defaults to 0 so the same model always gets the same fingerprint
+    :param closed: whether the mesh is watertight, defaults to None (checked in principal_frame())
+    :return: Fingerprint
+    """
+    if not isinstance(triangle_mesh, TriangleMesh):
+        triangle_mesh = TriangleMesh(triangle_mesh)
+
+    area = np.sum(triangle_mesh.areas, dtype=np.float64)
+    volume, _, _ = mass_properties(triangle_mesh)
+
+    # size along the principal axes (rotation invariant, unlike the axis aligned bounding box)
+    vertices = np.reshape(triangle_mesh.vectors, (-1, 3))
+    centroid, axes = principal_frame(vertices, triangle_mesh, closed)
+    extents = np.ptp((vertices-centroid) @ axes, axis=0)
+    extents = np.sort(extents)[::-1]
+
+    samples = sample_surface(triangle_mesh, 2*n_pairs, seed=seed)
+    centered = samples-np.mean(samples, axis=0)
+    moments = np.sort(np.linalg.eigvalsh(centered.T @ centered/samples.shape[0]))[::-1]
+
+    diff = samples[:n_pairs]-samples[n_pairs:]
+    distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+    scale = np.mean(distances)
+    d2, _ = np.histogram(distances/scale, bins=bins, range=(0, max_ratio))
+    d2 = d2/n_pairs
+
+    return Fingerprint(area, abs(volume), extents, moments, d2, scale)
@@ -0,0 +1,180 @@
+# ------------------------
+# @file     fingerprint_index.py
+# @date     October 2026
+# @author
+# @email
+# @brief    searchable on-disk index of reference model fingerprints, to find which reference a part came from
+# ------------------------
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from shape import Shape
+from fingerprint import FINGERPRINT_VERSION
+from metrics import chamfer_distance
+
+class FingerprintIndex:
+    def __init__(self, index_file=None):
+        """
+        Fingerprint vectors (see fingerprint.py) of a library of reference models, kept in one array so a query is a
+        single vectorized distance computation over every reference. Saved as a .npz with the vectors and file names.
+
+        :param index_file: .npz to load from and save to, defaults to None (in memory only)
+        """
+        self.index_file = index_file
+        self.files = []
+        self._rows = {}         # file -> row in vectors
+        self._vectors = None    # preallocated, only the first len(files) rows are used
+        if index_file is not None and os.path.isfile(index_file):
+            self.load()
+
+    def __len__(self):
+        return len(self.files)
+
+    @property
+    def vectors(self):
+        if self._vectors is None:
+            return np.empty((0, 0))
+        return self._vectors[:len(self.files)]
+
+    def load(self):
+        """
+        Load the index from index_file. An index made with a different fingerprint version is ignored.
+        """
+        saved = np.load(self.index_file)
+        if int(saved['version']) != FINGERPRINT_VERSION:
+            print(f'{self.index_file} is from an older fingerprint version, starting over')
+            return
+        self.files = saved['files'].tolist()
+        self._rows = {file: i for i, file in enumerate(self.files)}
+        # an index saved with no entries has no usable storage, insert() allocates it
+        self._vectors = np.array(saved['vectors'], np.float64) if self.files else None
+
+    def save(self):
+        """
+        Save the index to index_file. Written to a temporary file first so an interrupted save never breaks the index.
+        """
+        tmp = self.index_file + '.tmp.npz'
+        np.savez(tmp, vectors=self.vectors, files=np.array(self.files), version=FINGERPRINT_VERSION)
+        os.replace(tmp, self.index_file)
+
+    def insert(self, stl_file, vector):
+        """
+        Add a fingerprint vector, or replace it if the file is already in the index. Storage grows by doubling, so
+        adding references one at a time is cheap.
+
+        :param stl_file: reference file the vector is for
+        :param vector: Fingerprint.vector()
+        """
+        vector = np.asarray(vector, np.float64)
+        if stl_file in self._rows:
+            self._vectors[self._rows[stl_file]] = vector
+            return
+        n = len(self.files)
+        if self._vectors is None or self._vectors.shape[0] == 0:
+            self._vectors = np.empty((16, vector.shape[0]))
+        elif n == self._vectors.shape[0]:
+            grown = np.empty((max(2*n, 16), self._vectors.shape[1]))
+            grown[:n] = self._vectors
+            self._vectors = grown
+        self._vectors[n] = vector
+        self._rows[stl_file] = n
+        self.files.append(stl_file)
+
+    def add(self, stl_files):
+        """
+        Load reference models, compute their fingerprints and add them to the index.
+
+        :param stl_files: list of stl file locations
+        """
+        for stl_file in stl_files:
+            self.insert(stl_file, Shape(stl_file).get_fingerprint().vector())
+
+    def search(self, vectors, k=5):
+        """
+        Top k nearest references for each query vector, all queries at once.
+
+        :param vectors: numpy array of shape (q,d) of fingerprint vectors
+        :param k: number of references to return per query, defaults to 5
+        :return: distances and row indices, each of shape (q,min(k,len(self))), nearest first
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, np.float64))
+        references = self.vectors
+        k = min(k, len(self.files))
+        if k == 0:
+            return np.empty((vectors.shape[0], 0)), np.empty((vectors.shape[0], 0), np.intp)
+
+        # |a-b|^2 = |a|^2 - 2ab + |b|^2 as one matrix product
+        dist = (np.einsum('ij,ij->i', vectors, vectors)[:,None] - 2*vectors @ references.T
+                + np.einsum('ij,ij->i', references, references))
+        np.maximum(dist, 0, out=dist)
+
+        # partial sort for the top k, then order just those
+        rows = np.argpartition(dist, k-1, axis=1)[:,:k]
+        top = np.take_along_axis(dist, rows, axis=1)
+        order = np.argsort(top, axis=1)
+        return np.sqrt(np.take_along_axis(top, order, axis=1)), np.take_along_axis(rows, order, axis=1)
+
+    def query(self, shape, k=5):
+        """
+        Top k references whose fingerprints are closest to a shape's.
+
+        :param shape: Shape to look up
+        :param k: number of references to return, defaults to 5
+        :return: list of (file, fingerprint distance), nearest first
+        """
+        distances, rows = self.search(shape.get_fingerprint().vector(), k)
+        return [(self.files[row], float(distance)) for row, distance in zip(rows[0], distances[0])]
+
+    def find_matches(self, shape, k=5, levels=3):
+        """
+        Finds which reference a shape came from. Only the top k references by fingerprint are fully registered and
+        scored, instead of the whole library.
+
+        :param shape: Shape to look up
+        :param k: number of references to register against, defaults to 5
+        :param levels: pyramid levels used for registration, defaults to 3
+        :return: list of dicts with file, fingerprint distance, rmse and chamfer distance, best chamfer first
+        """
+        matches = []
+        for stl_file, fingerprint_distance in self.query(shape, k):
+            reference = Shape(stl_file, verbose=shape.verbose)
+            result = shape.register(reference, levels=levels)
+            matches.append({
+                'file': stl_file,
+                'fingerprint_distance': fingerprint_distance,
+                'rmse': float(result.rmse),
+                'chamfer': float(chamfer_distance(result.apply(shape.point_cloud), reference)),
+            })
+        return sorted(matches, key=lambda match: match['chamfer'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Index reference stls by fingerprint and find which one a part came from.')
+    parser.add_argument('index', help='index .npz file')
+    parser.add_argument('--add', nargs='+', default=[], help='reference stl files to add to the index')
+    parser.add_argument('--query', nargs='+', default=[], help='stl files to look up')
+    parser.add_argument('-k', type=int, default=5, help='references to return per query (default 5)')
+    parser.add_argument('--register', action='store_true', help='register the top k and rank them by chamfer distance')
+    args = parser.parse_args()
+
+    index = FingerprintIndex(args.index)
+    if args.add:
+        start = time.perf_counter()
+        index.add(args.add)
+        index.save()
+        print(f'added {len(args.add)} references in {time.perf_counter()-start:.2f}s, {len(index)} total', file=sys.stderr)
+
+    for query_file in args.query:
+        shape = Shape(query_file, verbose=False)
+        print(query_file)
+        if args.register:
+            for match in index.find_matches(shape, args.k):
+                print(f"  {match['file']}  fingerprint {match['fingerprint_distance']:.4f}  chamfer {match['chamfer']:.6f}")
+        else:
+            for stl_file, distance in index.query(shape, args.k):
+                print(f'  {stl_file}  fingerprint {distance:.4f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# ------------------------
+# @file     instrumentation.py
+# @date     October 2026
+# @author
+# @email
+# @brief    per-stage timing, counts and memory for the loading/comparison pipeline
+# ------------------------
+
+import json
+import time
+import tracemalloc
+
+class StageRecord:
+    def __init__(self, name):
+        """
+        Measurements for one run of one stage.
+
+        :param name: name of the stage, like 'load' or 'registration'
+        """
+        self.name = name
+        self.seconds = None
+        self.peak_bytes = None  # extra memory allocated at the stage's peak, if tracked
+        self.counts = {}    # point counts, iteration counts, etc.
+
+    def note(self, **counts):
+        """
+        Add counts to the record, like note(points=1000, iterations=12).
+        """
+        self.counts.update(counts)
+
+    def to_dict(self):
+        return {'stage': self.name, 'seconds': self.seconds, 'peak_bytes': self.peak_bytes, **self.counts}
+
+class _Stage:
+    """Context manager that times a stage and hands its record to the Instrumentation when done."""
+    def __init__(self, instrumentation, name, counts):
+        self.instrumentation = instrumentation
+        self.record = StageRecord(name)
+        self.record.note(**counts)
+
+    def __enter__(self):
+        if self.instrumentation.track_memory:
+            tracemalloc.reset_peak()
+            self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exc):
+        self.record.seconds = time.perf_counter()-self.start
+        if self.instrumentation.track_memory:
+            self.record.peak_bytes = tracemalloc.get_traced_memory()[1] - self.start_bytes
+        self.instrumentation.add(self.record)
+        return False
+
+class Instrumentation:
+    def __init__(self, track_memory=False, sink=None):
+        """
+        Collects a StageRecord for every instrumented stage. Use as
+
+            with instrumentation.stage('dedup', points=n) as record:
+                ...
+                record.note(unique=m)
+
+        Peak memory is the most memory allocated on top of what was already in use when the stage started. For nested
+        stages the outer stage only sees the peak after the last inner stage started.
+
+        :param track_memory: whether to record peak memory with tracemalloc (slower), defaults to False
+        :param sink: optional file location or open file to write one json line per finished stage, defaults to None
+        """
+        self.enabled = True
+        self.track_memory = track_memory
+        self.records = []
+
+        self._own_sink = isinstance(sink, str)
+        self.sink = open(sink, 'a') if self._own_sink else sink
+
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name, **counts):
+        """
+        :param name: name of the stage
+        :param counts: counts known at the start, like points=1000
+        :return: context manager that gives a StageRecord
+        """
+        return _Stage(self, name, counts)
+
+    def add(self, record):
+        self.records.append(record)
+        if self.sink is not None:
+            self.sink.write(json.dumps(record.to_dict()) + '\n')
+            self.sink.flush()
+
+    def report(self):
+        """
+        Totals for each stage name.
+
+        :return: dict of stage name -> {'calls', 'seconds', 'peak_bytes'}
+        """
+        report = {}
+        for record in self.records:
+            stage = report.setdefault(record.name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': None})
+            stage['calls'] += 1
+            stage['seconds'] += record.seconds
+            if record.peak_bytes is not None:
+                stage['peak_bytes'] = max(stage['peak_bytes'] or 0, record.peak_bytes)
+        return report
+
+    def __str__(self):
+        lines = []
+        for record in self.records:
+            counts = ' '.join(f'{k}={v}' for k, v in record.counts.items())
+            memory = f' peak {record.peak_bytes/1024**2:.1f}MB' if record.peak_bytes is not None else ''
+            lines.append(f'{record.name:<20} {record.seconds:.4f}s{memory} {counts}')
+        return '\n'.join(lines)
+
+    def close(self):
+        if self._own_sink and self.sink is not None:
+            self.sink.close()
+        self.sink = None
+
+class _NullRecord:
+    """Stands in for StageRecord when instrumentation is off."""
+    def note(self, **counts):
+        pass
+
+class _NullStage:
+    def __enter__(self):
+        return _NULL_RECORD
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_RECORD = _NullRecord()
+_NULL_STAGE = _NullStage()
+
+class NullInstrumentation:
+    """Does nothing. stage() always hands back the same object, so disabled instrumentation costs one method call."""
+    enabled = False
+    records = []
+
+    def stage(self, name, **counts):
+        return _NULL_STAGE
+
+    def report(self):
+        return {}
+
+    def close(self):
+        pass
+
+NULL_INSTRUMENTATION = NullInstrumentation()
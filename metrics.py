@@ -0,0 +1,129 @@
+# ------------------------
+# @file     metrics.py
+# @date     October 2026
+# @author
+# @email
+# @brief    chamfer, hausdorff and percentile deviation metrics between point clouds using nearest neighbors
+# ------------------------
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from spatial_index import SpatialIndex
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+def _points(cloud):
+    """
+    :param cloud: Shape, SpatialIndex or numpy array of shape (n,3)
+    :return: the points as a numpy array
+    """
+    if hasattr(cloud, 'get_spatial_index'):
+        return cloud.point_cloud
+    if isinstance(cloud, SpatialIndex):
+        return cloud.points
+    return np.asarray(cloud)
+
+def _points_and_index(cloud):
+    """
+    :param cloud: Shape, SpatialIndex or numpy array of shape (n,3)
+    :return: points and a SpatialIndex over them (the cached one for a Shape)
+    """
+    if hasattr(cloud, 'get_spatial_index'):
+        return cloud.point_cloud, cloud.get_spatial_index()
+    if isinstance(cloud, SpatialIndex):
+        return cloud.points, cloud
+    return cloud, SpatialIndex(cloud)
+
+def nearest_distances(source, target, chunk_size=100_000, workers=None):
+    """
+    Distance from every source point to its nearest target point. Queries are done in fixed size chunks, spread over
+    a thread pool (the KD-tree releases the GIL), so the only full size allocation is the output.
+
+    :param source: Shape, SpatialIndex or numpy array of shape (n,3)
+    :param target: Shape, SpatialIndex or numpy array of shape (m,3)
+    :param chunk_size: points per query, defaults to 100,000
+    :param workers: number of threads, defaults to None (one per core)
+    :return: distances of shape (n,)
+    """
+    source = _points(source)
+    _, index = _points_and_index(target)
+    distances = np.empty(source.shape[0])
+
+    def query(start):
+        distances[start:start+chunk_size] = index.nearest_distances(source[start:start+chunk_size])
+
+    starts = range(0, source.shape[0], chunk_size)
+    if workers == 1 or len(starts) <= 1:
+        for start in starts:
+            query(start)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() so any exception from a chunk is raised here
+            list(pool.map(query, starts))
+    return distances
+
+def chamfer_distance(cloud_a, cloud_b, squared=False, chunk_size=100_000, workers=None):
+    """
+    Symmetric chamfer distance: mean nearest neighbor distance from a to b plus from b to a.
+
+    :param cloud_a: Shape, SpatialIndex or numpy array of shape (n,3)
+    :param cloud_b: Shape, SpatialIndex or numpy array of shape (m,3)
+    :param squared: use squared distances, defaults to False
+    :param chunk_size: points per query, defaults to 100,000
+    :param workers: number of threads, defaults to None (one per core)
+    :return: chamfer distance
+    """
+    a_to_b = nearest_distances(cloud_a, cloud_b, chunk_size, workers)
+    b_to_a = nearest_distances(cloud_b, cloud_a, chunk_size, workers)
+    if squared:
+        return np.mean(a_to_b**2) + np.mean(b_to_a**2)
+    return np.mean(a_to_b) + np.mean(b_to_a)
+
+def hausdorff_distance(cloud_a, cloud_b, symmetric=True, chunk_size=100_000, workers=None):
+    """
+    Hausdorff distance: the furthest any point is from the other cloud.
+
+    :param cloud_a: Shape, SpatialIndex or numpy array of shape (n,3)
+    :param cloud_b: Shape, SpatialIndex or numpy array of shape (m,3)
+    :param symmetric: check both directions, otherwise only how far a's points are from b, defaults to True
+    :param chunk_size: points per query, defaults to 100,000
+    :param workers: number of threads, defaults to None (one per core)
+    :return: hausdorff distance
+    """
+    distance = np.max(nearest_distances(cloud_a, cloud_b, chunk_size, workers), initial=0)
+    if symmetric:
+        distance = max(distance, np.max(nearest_distances(cloud_b, cloud_a, chunk_size, workers), initial=0))
+    return distance
+
+def deviation_percentiles(distances, percentiles=DEFAULT_PERCENTILES):
+    """
+    :param distances: array of nearest neighbor distances
+    :param percentiles: percentiles to find, defaults to (50, 90, 95, 99)
+    :return: dict of percentile -> distance
+    """
+    values = np.percentile(distances, percentiles) if len(distances) else [np.nan]*len(percentiles)
+    return {p: float(v) for p, v in zip(percentiles, values)}
+
+def cloud_metrics(cloud_a, cloud_b, percentiles=DEFAULT_PERCENTILES, chunk_size=100_000, workers=None):
+    """
+    Every metric between two point clouds, with the nearest neighbor queries in each direction done only once.
+
+    :param cloud_a: Shape, SpatialIndex or numpy array of shape (n,3)
+    :param cloud_b: Shape, SpatialIndex or numpy array of shape (m,3)
+    :param percentiles: percentiles of deviation to report, defaults to (50, 90, 95, 99)
+    :param chunk_size: points per query, defaults to 100,000
+    :param workers: number of threads, defaults to None (one per core)
+    :return: dict with chamfer, one sided and symmetric hausdorff, rms and percentile deviations in each direction
+    """
+    a_to_b = nearest_distances(cloud_a, cloud_b, chunk_size, workers)
+    b_to_a = nearest_distances(cloud_b, cloud_a, chunk_size, workers)
+    return {
+        'chamfer': float(np.mean(a_to_b) + np.mean(b_to_a)),
+        'hausdorff': float(max(np.max(a_to_b, initial=0), np.max(b_to_a, initial=0))),
+        'hausdorff_a_to_b': float(np.max(a_to_b, initial=0)),
+        'hausdorff_b_to_a': float(np.max(b_to_a, initial=0)),
+        'rms_a_to_b': float(np.sqrt(np.mean(a_to_b**2))),
+        'rms_b_to_a': float(np.sqrt(np.mean(b_to_a**2))),
+        'percentiles_a_to_b': deviation_percentiles(a_to_b, percentiles),
+        'percentiles_b_to_a': deviation_percentiles(b_to_a, percentiles),
+    }
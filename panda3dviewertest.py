@@ -7,60 +7,23 @@
 # ------------------------
 
 import numpy as np
-import time
 from shape import Shape
-from panda3d_viewer import Viewer, ViewerConfig
-from procrustes import generic, rotational
+from point_cloud_viewer import PointCloudViewer
+from color_maps import create_color_arrays
+from spatial_index import SpatialIndex
+from registration import weighted_fit, apply_transform
+from alignment import initial_alignment
 
-def show_point_cloud(cloud, colors):
+def show_point_cloud(cloud, colors, max_points=1_000_000):
     print('showing point cloud')
+    # fits the model in the window, uploads it once and shows fewer points for big clouds, see point_cloud_viewer.py
+    PointCloudViewer(cloud, colors, max_points=max_points).show()
 
-    # make model fit in window by shrinking/expanding as needed
-    print(f'model max: {np.max(cloud)}')
-    if np.max(cloud) < 10:
-        # scale model up
-        vertices = cloud*10
-    elif np.max(cloud) > 100:
-        # scale model down
-        vertices = cloud/100
-    else:
-        vertices = cloud
-    
-    # convert array to float32 then uint32 to ensure viewer processes correctly
-    vertices = np.array(vertices, np.float32)
-    vertices = vertices.view(dtype=np.uint32)
-
-    if not isinstance(cloud, np.ndarray):
-        print('issue found')
-
-    # create window
-    with Viewer(show_grid=False) as viewer:
-        viewer.reset_camera((10, 10, 15), look_at=(0, 0, 0))
-        viewer.append_group('root')
-        viewer.append_cloud('root', 'cloud', thickness=4)
-
-        while True:
-            viewer.set_cloud_data('root', 'cloud', vertices, colors)
-            time.sleep(0.03)
-
-def pad_point_cloud(orig_cloud, other_cloud):
-    # pad shapes
-
-    padding = np.zeros(( np.abs(orig_cloud.shape[0]-other_cloud.shape[0]), 3))
-    
-    # if orig smaller than other
-    if orig_cloud.shape[0] < other_cloud.shape[0]:
-        print('orig is smaller')
-        orig_cloud = np.concatenate((orig_cloud, padding))
-    else:
-        print('other cloud smaller')
-        other_cloud = np.concatenate((other_cloud, padding))
-    
-    return orig_cloud, other_cloud
-    
 def compare_with_procrustes(orig_point_cloud, other_point_cloud, scale=False, threshhold=.005, rounding=4):
     """
-    Compares 2 point clouds using the Procrustes method. Then compares computed point clouds to see how close each model is. Also computes frobenius norm, and root mean squared error. Accuracy score is based off threshold passed in. Can include scaling or not (see procrustes for more explanation). 
+    Compares 2 point clouds using a Procrustes fit. Then compares computed point clouds to see how close each model is. Also computes frobenius norm, and root mean squared error. Accuracy score is based off threshold passed in. Can include scaling or not. 
+
+    Points are paired with their nearest neighbor (after lining up principal axes) and fit with the weighted closed form solver in registration.py, so the clouds don't need to be the same size.
 
     # NOTES: threshhold of approximate closeness needs adjusting. Not accurate for all models. Need way to measure accurate measure also.
 
@@ -68,21 +31,25 @@ def compare_with_procrustes(orig_point_cloud, other_point_cloud, scale=False, th
     :param scale: whether or not to allow scaling, defaults to False
     :param threshhold: determines how close points are to determine if they 'match' for accuracy score, defaults to .005
     :param rounding: how many decimals to round to, defaults to 4
-    :return: frobenius norm, root mean squared error, 'accuracy' score
+    :return: approx match and match masks, transformed points, original points, matching reference points
     """
-    result = rotational(orig_point_cloud, other_point_cloud, translate=True, scale=scale, pad=True)
-    
-    frob_error = np.round(result.error, 4)
-    
-    # new reference matrix
-    new_b = np.round(result.new_b, rounding)
-
-    # transformed matrix p
-    transformed = np.dot(result.new_a, result.t)
+    index = SpatialIndex(other_point_cloud)
+    start = initial_alignment(orig_point_cloud, index)
+    moved = apply_transform(orig_point_cloud, start)
+    _, idx = index.nearest(moved)
+    transform = weighted_fit(moved, other_point_cloud[idx], scale=scale) @ start
+
+    # transformed matrix p, and the closest reference point to each of its points
+    transformed = apply_transform(orig_point_cloud, transform)
+    _, idx = index.nearest(transformed)
+    frob_error = np.round(np.sum((transformed-other_point_cloud[idx])**2), 4)
     transformed = np.round(transformed, rounding)
 
+    # new reference matrix
+    new_b = np.round(other_point_cloud[idx], rounding)
+
     # get error for every value
-    error = transformed-result.new_b
+    error = transformed-other_point_cloud[idx]
     error = np.round(error, rounding)
     # print(f'max error: {np.max(error)} {np.min(error)} shape: {error.shape}')
     # print(f'row 1: {error[0]}')
@@ -120,28 +87,7 @@ def compare_with_procrustes(orig_point_cloud, other_point_cloud, scale=False, th
     print(f'matched: {count_matched} approx match: {count_approx_match}')
     print(f'total: {transformed.shape[0]}')
     print(f'Frobenius score: {frob_error} RMSE: {rmse} Score: {comparison_score*100}%')
-    return approx_match, matched, transformed, result.new_a, result.new_b
-
-def create_color_arrays(orig_array, other_array, indices_of_approx_match, indices_of_match):
-    # create color array for display
-    colors_of_orig = np.ones((orig_array.shape[0], 4), np.float32)
-
-    indices_of_no_match = np.invert(indices_of_match)
-    colors_of_orig[indices_of_no_match,:] = np.array([1,.5,0,3])                    # orange
-    colors_of_orig[indices_of_approx_match,:] = np.array([.75,.75,.5,3])     # light green
-    colors_of_orig[indices_of_match, :] = np.array([0,0,1,3])                # blue
-
-    # color array for other shape
-    colors_of_other = np.ones((other_array.shape[0], 4), np.float32)
-    colors_of_other[indices_of_no_match,:] = np.array([1,0,0,3])                   # red
-    colors_of_other[indices_of_approx_match,:] = np.array([.72,.62,.32,3])  # light brown
-    colors_of_other[indices_of_match, :] = np.array([0,1,0,3])              # green
-
-    shape = np.vstack((other_array, orig_array))
-    all_colors = np.vstack((colors_of_other, colors_of_orig))
-
-    return shape, all_colors, colors_of_orig, colors_of_other
-
+    return approx_match, matched, transformed, orig_point_cloud, new_b
 
 # ----- testing -------
 
@@ -153,16 +99,12 @@ def main():
     newshape = Shape('model_files/APC_orig_propeller.stl')
     rivalshape = Shape('model_files/APC_heavily_mod_propeller.stl')
 
-    # pad point clouds with 0's
-    orig_padded, other_padded = pad_point_cloud(newshape.point_cloud, rivalshape.point_cloud)
     # perform procrustes
     indices_of_approx_match, indices_of_match, transformed, newa, newb = compare_with_procrustes(newshape.point_cloud, rivalshape.point_cloud, scale=False)#, threshhold=.0005)
     # indices_of_match, indices_of_approx_match = newshape.compare_point_clouds(rivalshape)
     shape, all_colors, orig_colors, other_colors = create_color_arrays(newb, transformed, indices_of_approx_match, indices_of_match)
 
 
-    # show_point_cloud(orig_padded, orig_colors)
-    # show_point_cloud(other_padded, other_colors)
     show_point_cloud(shape, all_colors)
 
     # overlap_origs = np.vstack((transformed, newb))
@@ -0,0 +1,149 @@
+# ------------------------
+# @file     point_cloud_viewer.py
+# @date     October 2026
+# @author
+# @email
+# @brief    reusable panda3d point cloud viewer that uploads data once, with levels of detail for big clouds
+# ------------------------
+
+import numpy as np
+from panda3d_viewer import Viewer
+
+def normalize_to_box(cloud, size=10):
+    """
+    Centers a point cloud on the origin and scales it uniformly so its longest bounding box side is size.
+
+    :param cloud: numpy array of shape (n,3)
+    :param size: longest side after scaling, defaults to 10
+    :return: float32 array of shape (n,3), and the (center, scale) used so other data can be put in the same frame
+    """
+    cloud = np.asarray(cloud)
+    low = np.min(cloud, axis=0)
+    high = np.max(cloud, axis=0)
+    center = (low+high)/2
+    extent = np.max(high-low)
+    scale = size/extent if extent > 0 else 1.0
+
+    vertices = np.asarray(cloud, np.float32) - center.astype(np.float32)
+    vertices *= np.float32(scale)
+    return vertices, (center, scale)
+
+def lod_levels(n_points, min_points=10_000, factor=4):
+    """
+    Point counts for a level of detail pyramid, from all points down to about min_points, each level factor times
+    smaller than the one before.
+
+    :param n_points: number of points in the full cloud
+    :param min_points: smallest level, defaults to 10,000
+    :param factor: reduction between levels, defaults to 4
+    :return: list of point counts, largest first
+    """
+    levels = [n_points]
+    while levels[-1]//factor >= min_points:
+        levels.append(levels[-1]//factor)
+    return levels
+
+class PointCloudViewer:
+    def __init__(self, cloud, colors, max_points=1_000_000, size=10, thickness=4, seed=0):
+        """
+        Point cloud viewer around panda3d_viewer. The cloud is normalized into a box and shuffled once, so every level
+        of detail is just the first k points (a view, not a copy) and is still spread over the whole model. Data is
+        only sent to the viewer when it changes.
+
+        :param cloud: numpy array of shape (n,3)
+        :param colors: numpy array of shape (n,4) of RGBA colors
+        :param max_points: show the most detailed level with at most this many points, defaults to 1,000,000
+        :param size: longest side of the model in the window, defaults to 10
+        :param thickness: point size, defaults to 4
+        :param seed: random seed for the shuffle, defaults to 0
+        """
+        self.max_points = max_points
+        self.size = size
+        self.thickness = thickness
+        self.seed = seed
+        self.viewer = None
+        self.set_data(cloud, colors)
+
+    def set_data(self, cloud, colors):
+        """
+        Replace the cloud and colors. The normalization and level of detail order are recomputed here, once.
+
+        :param cloud: numpy array of shape (n,3)
+        :param colors: numpy array of shape (n,4)
+        """
+        vertices, self.frame = normalize_to_box(cloud, self.size)
+        self._order = np.random.default_rng(self.seed).permutation(vertices.shape[0])
+        # the viewer takes float32 coordinates as uint32 in its point cloud format
+        self._vertices = vertices[self._order].view(np.uint32)
+        self._colors = np.asarray(colors, np.float32)[self._order]
+
+        self.levels = lod_levels(vertices.shape[0])
+        self.level = next((i for i, count in enumerate(self.levels) if count <= self.max_points), len(self.levels)-1)
+        self._dirty = True
+        self.refresh()
+
+    def set_colors(self, colors):
+        """
+        Replace only the colors, like after rescoring with a different threshold.
+
+        :param colors: numpy array of shape (n,4), in the same order as the cloud
+        """
+        self._colors = np.asarray(colors, np.float32)[self._order]
+        self._dirty = True
+        self.refresh()
+
+    def set_level(self, level):
+        """
+        Switch level of detail, 0 is every point and each level after that has fewer.
+
+        :param level: index into levels
+        """
+        level = min(max(level, 0), len(self.levels)-1)
+        if level != self.level:
+            self.level = level
+            self._dirty = True
+            self.refresh()
+
+    def refresh(self):
+        """
+        Send the current level to the viewer if it is open and anything changed since the last upload.
+        """
+        if self.viewer is None or not self._dirty:
+            return
+        count = self.levels[self.level]
+        print(f'showing {count} of {self.levels[0]} points')
+        self.viewer.set_cloud_data('root', 'cloud', self._vertices[:count], self._colors[:count])
+        self._dirty = False
+
+    def open(self):
+        """
+        Open the window and upload the cloud. The window runs in its own process, so this returns straight away.
+        """
+        if self.viewer is not None:
+            return
+        self.viewer = Viewer(show_grid=False)
+        self.viewer.reset_camera((self.size, self.size, 1.5*self.size), look_at=(0, 0, 0))
+        self.viewer.append_group('root')
+        self.viewer.append_cloud('root', 'cloud', thickness=self.thickness)
+        self._dirty = True
+        self.refresh()
+
+    def close(self):
+        if self.viewer is not None:
+            self.viewer.stop()
+            self.viewer = None
+
+    def show(self):
+        """
+        Open the window and wait until it is closed, without resending anything.
+        """
+        self.open()
+        self.viewer.join()
+        self.viewer = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,294 @@
+# ------------------------
+# @file     registration.py
+# @date     October 2026
+# @author
+# @email
+# @brief    rigid registration (ICP) of point clouds without open3d
+# ------------------------
+
+import time
+import numpy as np
+from spatial_index import SpatialIndex
+
+def make_transform(rotation=None, translation=None):
+    """
+    Builds a 4x4 homogeneous transformation matrix.
+
+    :param rotation: 3x3 rotation (can include scale), defaults to None (identity)
+    :param translation: translation of shape (3,), defaults to None (zeros)
+    :return: 4x4 numpy array
+    """
+    transform = np.eye(4)
+    if rotation is not None:
+        transform[:3,:3] = rotation
+    if translation is not None:
+        transform[:3,3] = np.ravel(translation)
+    return transform
+
+def apply_transform(points, transform, out=None):
+    """
+    Applies a 4x4 transformation matrix to a point cloud.
+
+    :param points: numpy array of shape (n,3)
+    :param transform: 4x4 transformation matrix
+    :param out: optional array to write the result into (can be points itself), defaults to None
+    :return: transformed points of shape (n,3)
+    """
+    points = np.asarray(points)
+    rotation = transform[:3,:3].astype(points.dtype, copy=False)
+    translation = transform[:3,3].astype(points.dtype, copy=False)
+    if out is None:
+        out = points @ rotation.T
+    elif out is points:
+        # matmul can't write over its own input
+        out[...] = points @ rotation.T
+    else:
+        np.matmul(points, rotation.T, out=out)
+    out += translation
+    return out
+
+def weighted_fit(source, target, weights=None, scale=False, allow_reflection=False):
+    """
+    Closed form transform that minimizes the weighted sum of squared distances between source[i] and target[i]
+    (Kabsch, or Umeyama with scale). Works straight from correspondence pairs of any length, no padding needed.
+
+    :param source: numpy array of shape (n,3)
+    :param target: numpy array of shape (n,3)
+    :param weights: weight of each pair of shape (n,), defaults to None (all 1)
+    :param scale: also fit a uniform scale, defaults to False
+    :param allow_reflection: allow a mirrored fit instead of forcing a proper rotation, defaults to False
+    :return: 4x4 transformation matrix
+    """
+    stats = AlignmentStatistics()
+    stats.add(source, target, weights)
+    return stats.solve(scale, allow_reflection)
+
+# rows converted to float64 at a time when accumulating statistics
+_BLOCK_SIZE = 1<<16
+
+class AlignmentStatistics:
+    def __init__(self):
+        """
+        Running weighted sums over corresponding point pairs that are all the closed form rigid fit needs: the total
+        weight, the sum of each side, the 3x3 cross covariance and second moments. Pairs are added a chunk at a time, so
+        fitting any number of pairs takes constant memory. Sums are kept relative to the first chunk's centroids so
+        models far from the origin don't lose precision.
+        """
+        self.count = 0      # number of pairs
+        self.weight = 0.0   # total weight of the pairs
+        self.source_origin = None
+        self.target_origin = None
+        self.source_sum = np.zeros(3)
+        self.target_sum = np.zeros(3)
+        self.cross = np.zeros((3,3))          # sum of target x source outer products
+        self.source_outer = np.zeros((3,3))   # sum of source x source outer products
+        self.target_sq = 0.0
+
+    def add(self, source, target, weights=None):
+        """
+        Adds a chunk of pairs, where source[i] matches target[i].
+
+        :param source: numpy array of shape (n,3)
+        :param target: numpy array of shape (n,3)
+        :param weights: weight of each pair of shape (n,), defaults to None (all 1)
+        """
+        if source.shape[0] == 0:
+            return
+        if self.source_origin is None:
+            self.source_origin = np.mean(source, axis=0, dtype=np.float64)
+            self.target_origin = np.mean(target, axis=0, dtype=np.float64)
+        self.count += source.shape[0]
+        # reduce in float64 blocks, so float32 input isn't upcast all at once
+        for start in range(0, source.shape[0], _BLOCK_SIZE):
+            block_source = source[start:start+_BLOCK_SIZE] - self.source_origin
+            block_target = target[start:start+_BLOCK_SIZE] - self.target_origin
+            if weights is None:
+                block_weights = np.ones(block_source.shape[0])
+            else:
+                block_weights = np.asarray(weights[start:start+_BLOCK_SIZE], np.float64)
+            weighted_source = block_source*block_weights[:,None]
+            self.weight += np.sum(block_weights)
+            self.source_sum += np.sum(weighted_source, axis=0)
+            self.target_sum += block_weights @ block_target
+            self.cross += block_target.T @ weighted_source
+            self.source_outer += block_source.T @ weighted_source
+            self.target_sq += np.einsum('i,ij,ij->', block_weights, block_target, block_target)
+
+    def solve(self, scale=False, allow_reflection=False):
+        """
+        Closed form transform (Kabsch, or Umeyama with scale) that best maps the source points onto the target points.
+
+        :param scale: also fit a uniform scale, defaults to False
+        :param allow_reflection: allow a mirrored fit instead of forcing a proper rotation, defaults to False
+        :return: 4x4 transformation matrix
+        """
+        if self.weight <= 0:
+            return np.eye(4)
+        source_mean = self.source_sum/self.weight
+        target_mean = self.target_sum/self.weight
+        cov_mat = self.cross - self.weight*np.outer(target_mean, source_mean)
+
+        U, S, Vt = np.linalg.svd(cov_mat)
+        # flip the last axis if the best fit is a reflection
+        d = 1 if allow_reflection else np.sign(np.linalg.det(U @ Vt))
+        rotation = U @ np.diag([1, 1, d]) @ Vt
+        if scale:
+            source_var = np.trace(self.source_outer) - self.weight*(source_mean @ source_mean)
+            if source_var > 0:
+                rotation *= (S[0] + S[1] + d*S[2])/source_var
+
+        # back from the shifted frame
+        source_mean += self.source_origin
+        target_mean += self.target_origin
+        return make_transform(rotation, target_mean - rotation @ source_mean)
+
+    def sum_squared_error(self, transform):
+        """
+        Weighted sum of squared distances between the transformed source points and their targets, from the running sums
+        alone.
+
+        :param transform: 4x4 transformation matrix (rotation can include scale)
+        :return: sum of squared errors
+        """
+        if self.weight <= 0:
+            return 0.0
+        rotation = transform[:3,:3]
+        # translation in the shifted frame
+        translation = transform[:3,3] + rotation @ self.source_origin - self.target_origin
+        error = np.sum((rotation.T @ rotation)*self.source_outer) + self.target_sq + self.weight*(translation @ translation)
+        error += 2*translation @ (rotation @ self.source_sum) - 2*translation @ self.target_sum
+        error -= 2*np.sum(rotation*self.cross)
+        return max(float(error), 0.0)
+
+class RegistrationResult:
+    def __init__(self, transform, rmse, iterations, converged, costs=None, timings=None):
+        """
+        Result of registering one point cloud to another.
+
+        :param transform: 4x4 transformation matrix taking the source onto the target
+        :param rmse: root mean squared distance between corresponding points after the last iteration
+        :param iterations: number of iterations run
+        :param converged: whether the cost change fell under the tolerance before max iterations
+        :param costs: rmse at every iteration, defaults to None
+        :param timings: seconds taken by every iteration, defaults to None
+        """
+        self.transform = transform
+        self.rmse = rmse
+        self.iterations = iterations
+        self.converged = converged
+        self.costs = [] if costs is None else costs
+        self.timings = [] if timings is None else timings
+        self.level_iterations = [iterations]   # iterations at each pyramid level
+
+    @property
+    def rotation(self):
+        return self.transform[:3,:3]
+
+    @property
+    def translation(self):
+        return self.transform[:3,3]
+
+    def apply(self, points, out=None):
+        """
+        Applies the registration transform to a point cloud.
+
+        :param points: numpy array of shape (n,3)
+        :param out: optional array to write the result into, defaults to None
+        :return: transformed points
+        """
+        return apply_transform(points, self.transform, out)
+
+    def __str__(self):
+        return f'{self.transform} \nrmse: {self.rmse} \niterations: {self.iterations} converged: {self.converged}'
+
+class ICPRegistration:
+    def __init__(self, max_iterations=50, tolerance=1e-6, max_correspondence_distance=np.inf, workers=1):
+        """
+        Point to point iterative closest point registration. Every iteration finds the nearest target point for all
+        source points in one batched KD-tree query, then solves the best rigid transform in closed form with an SVD.
+
+        :param max_iterations: stop after this many iterations, defaults to 50
+        :param tolerance: stop when the rmse improves by less than this, defaults to 1e-6
+        :param max_correspondence_distance: ignore pairs further apart than this, defaults to infinity
+        :param workers: threads used for the nearest neighbor queries, -1 for all cores, defaults to 1
+        """
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.max_correspondence_distance = max_correspondence_distance
+        self.workers = workers
+
+    def register(self, source, target, initial_transform=None):
+        """
+        Registers the source point cloud onto the target.
+
+        :param source: numpy array of shape (n,3)
+        :param target: numpy array of shape (m,3) or a SpatialIndex built over it
+        :param initial_transform: 4x4 starting guess, defaults to None (identity)
+        :return: RegistrationResult
+        """
+        if not isinstance(target, SpatialIndex):
+            target = SpatialIndex(target)
+
+        transform = np.eye(4) if initial_transform is None else np.array(initial_transform, np.float64)
+        moved = apply_transform(source, transform)
+
+        costs = []
+        timings = []
+        converged = False
+        prev_cost = np.inf
+        for _ in range(self.max_iterations):
+            start = time.perf_counter()
+
+            # 1. nearest target point for every source point
+            dist, idx = target.nearest(moved, self.max_correspondence_distance, self.workers)
+            valid = np.isfinite(dist)
+            if not valid.any():
+                break
+            cost = np.sqrt(np.mean(dist[valid]**2))
+
+            # 2. closed form update from the correspondences
+            step = weighted_fit(moved[valid], target.points[idx[valid]])
+            apply_transform(moved, step, out=moved)
+            transform = step @ transform
+
+            costs.append(cost)
+            timings.append(time.perf_counter()-start)
+
+            if prev_cost - cost < self.tolerance:
+                converged = True
+                break
+            prev_cost = cost
+
+        # cost of the final pose
+        dist, _ = target.nearest(moved, self.max_correspondence_distance, self.workers)
+        valid = np.isfinite(dist)
+        rmse = np.sqrt(np.mean(dist[valid]**2)) if valid.any() else np.inf
+
+        return RegistrationResult(transform, rmse, len(costs), converged, costs, timings)
+
+    def register_pyramid(self, levels, initial_transform=None):
+        """
+        Coarse to fine registration. Runs ICP on each level in order, starting every level from the transform found
+        on the level before it, so the expensive fine levels only need a few iterations to finish.
+
+        :param levels: list of (source points, target points or SpatialIndex) pairs, coarsest first
+        :param initial_transform: 4x4 starting guess for the coarsest level, defaults to None (identity)
+        :return: RegistrationResult of the last level, with costs and timings of every level
+        """
+        transform = initial_transform
+        costs = []
+        timings = []
+        level_iterations = []
+        result = None
+        for source, target in levels:
+            result = self.register(source, target, transform)
+            transform = result.transform
+            costs.extend(result.costs)
+            timings.extend(result.timings)
+            level_iterations.append(result.iterations)
+
+        result.costs = costs
+        result.timings = timings
+        result.iterations = len(costs)
+        result.level_iterations = level_iterations
+        return result
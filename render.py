@@ -0,0 +1,240 @@
+# ------------------------
+# @file     render.py
+# @date     October 2026
+# @author
+# @email
+# @brief    headless rendering of deviation colored point clouds and meshes to png, numpy only
+# ------------------------
+
+import os
+import sys
+import time
+import zlib
+import struct
+import argparse
+import numpy as np
+from triangles import TriangleMesh
+from registration import apply_transform
+from color_maps import deviation_colors, ORIG_COLORS
+
+def write_png(file_name, image):
+    """
+    Writes an RGB image as a png, using only zlib.
+
+    :param file_name: location of the png
+    :param image: uint8 array of shape (height,width,3)
+    """
+    height, width, _ = image.shape
+    # every row starts with filter type 0 (none)
+    rows = np.zeros((height, width*3+1), np.uint8)
+    rows[:,1:] = image.reshape(height, width*3)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    with open(file_name, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+def view_rotation(elevation=30, azimuth=45):
+    """
+    Rotation from model coordinates to camera coordinates (x right, y up, z towards the viewer), for a camera looking
+    at the model from the given angles.
+
+    :param elevation: degrees above the xy plane, defaults to 30
+    :param azimuth: degrees around the z axis, defaults to 45
+    :return: 3x3 rotation
+    """
+    el = np.radians(elevation)
+    az = np.radians(azimuth)
+    # spin around z, then tilt so z points up on screen
+    spin = np.array([[np.cos(az), -np.sin(az), 0], [np.sin(az), np.cos(az), 0], [0, 0, 1]])
+    tilt = np.array([[1, 0, 0], [0, np.sin(el), np.cos(el)], [0, -np.cos(el), np.sin(el)]])
+    return tilt @ spin
+
+def render_points(points, colors, width=800, height=600, elevation=30, azimuth=45, point_size=2,
+                  background=(255, 255, 255), margin=.05):
+    """
+    Draws points with an orthographic camera into an image. Every point is splatted as a point_size square and a
+    z-buffer keeps the nearest point at every pixel, all with vectorized scatter operations. Points are darkened with
+    depth so the shape reads without lighting.
+
+    :param points: numpy array of shape (n,3)
+    :param colors: numpy array of shape (n,3) or (n,4) with values from 0 to 1 (alpha is ignored)
+    :param width: image width in pixels, defaults to 800
+    :param height: image height in pixels, defaults to 600
+    :param elevation: camera elevation in degrees, defaults to 30
+    :param azimuth: camera azimuth in degrees, defaults to 45
+    :param point_size: splat size in pixels, defaults to 2
+    :param background: RGB background color, defaults to white
+    :param margin: empty border as a fraction of the image, defaults to .05
+    :return: uint8 image of shape (height,width,3)
+    """
+    image = np.empty((height, width, 3), np.uint8)
+    image[:] = background
+    points = np.asarray(points)
+    if points.shape[0] == 0:
+        return image
+
+    camera = np.asarray(points, np.float32) @ view_rotation(elevation, azimuth).T.astype(np.float32)
+
+    # fit the bounding box of the projected model in the image
+    low = np.min(camera, axis=0)
+    high = np.max(camera, axis=0)
+    extent = np.maximum(high-low, 1e-12)
+    scale = (1-2*margin)*min(width/extent[0], height/extent[1])
+    x = np.clip((camera[:,0]-(low[0]+high[0])/2)*scale + width/2, 0, width-1).astype(np.int32)
+    y = np.clip((-(camera[:,1]-(low[1]+high[1])/2))*scale + height/2, 0, height-1).astype(np.int32)
+    depth = camera[:,2]
+
+    # draw into a buffer padded by point_size on every side so splats never need bounds checks
+    pad = point_size
+    stride = width + 2*pad
+    pixel = (y+pad)*stride + (x+pad)
+    offsets = [dy*stride + dx for dy in range(-(point_size//2), point_size-point_size//2)
+               for dx in range(-(point_size//2), point_size-point_size//2)]
+
+    # z-buffer, larger z is closer to the camera, one pass per splat offset keeps the index arrays small
+    zbuffer = np.full((height+2*pad)*stride, -np.inf, np.float32)
+    for offset in offsets:
+        np.maximum.at(zbuffer, pixel+offset, depth)
+
+    colors = np.clip(np.asarray(colors, np.float32)[:,:3], 0, 1)
+    shade = .55 + .45*(depth-low[2])/max(extent[2], 1e-12)
+    rgb = (colors*shade[:,None]*255).astype(np.uint8)
+
+    buffer = np.empty(((height+2*pad)*stride, 3), np.uint8)
+    buffer[:] = background
+    for offset in offsets:
+        splat = pixel+offset
+        visible = depth >= zbuffer[splat]
+        buffer[splat[visible]] = rgb[visible]
+    image[:] = buffer.reshape(height+2*pad, stride, 3)[pad:pad+height, pad:pad+width]
+    return image
+
+def _stratified_samples(triangle_mesh, n_points, seed=0):
+    """
+    Spreads about n_points over a mesh surface with every face getting a share proportional to its area (systematic
+    sampling), so faces are visited in order instead of picked at random like sample_surface(). Leaves fewer holes
+    for the same number of points and is a lot faster to gather.
+
+    :param triangle_mesh: TriangleMesh
+    :param n_points: about how many points to sample
+    :param seed: random seed, defaults to 0
+    :return: float32 points of shape (k,3) and the face of every point of shape (k,)
+    """
+    rng = np.random.default_rng(seed)
+    areas = np.asarray(triangle_mesh.areas, np.float64)
+    total_area = np.sum(areas)
+    if total_area <= 0:
+        raise Exception('Mesh has no surface area to sample.')
+    edges = np.floor(np.cumsum(areas)*(n_points/total_area) + rng.random())
+    counts = np.diff(edges, prepend=0).astype(np.int64)
+    faces = np.repeat(np.arange(areas.shape[0]), counts)
+
+    r1 = np.sqrt(rng.random(faces.shape[0], np.float32))
+    r2 = rng.random(faces.shape[0], np.float32)
+    tri = np.asarray(triangle_mesh.vectors, np.float32)[faces]
+    points = (1-r1)[:,None]*tri[:,0]
+    points += (r1*(1-r2))[:,None]*tri[:,1]
+    points += (r1*r2)[:,None]*tri[:,2]
+    return points, faces
+
+def render_mesh(triangle_mesh, face_colors, width=800, height=600, elevation=30, azimuth=45, density=2, **kwargs):
+    """
+    Draws a shaded mesh by splatting points spread over its surface (density samples per image pixel), lit by the
+    face normals from the camera direction.
+
+    :param triangle_mesh: TriangleMesh (or (m,3,3) array)
+    :param face_colors: numpy array of shape (m,3) or (m,4) with values from 0 to 1
+    :param width: image width in pixels, defaults to 800
+    :param height: image height in pixels, defaults to 600
+    :param elevation: camera elevation in degrees, defaults to 30
+    :param azimuth: camera azimuth in degrees, defaults to 45
+    :param density: samples per image pixel, defaults to 2
+    :param kwargs: passed on to render_points()
+    :return: uint8 image of shape (height,width,3)
+    """
+    if not isinstance(triangle_mesh, TriangleMesh):
+        triangle_mesh = TriangleMesh(triangle_mesh)
+    points, faces = _stratified_samples(triangle_mesh, density*width*height)
+
+    # two sided lambert shading from a light at the camera
+    toward_camera = view_rotation(elevation, azimuth)[2]
+    light = np.abs(triangle_mesh.normals[faces] @ toward_camera)
+    colors = np.asarray(face_colors, np.float32)[faces,:3]*(.3 + .7*light[:,None]).astype(np.float32)
+    return render_points(points, colors, width, height, elevation, azimuth, **kwargs)
+
+def render_deviation(candidate, reference, file_name, match_distance=.001, approx_distance=.01, transform=None,
+                     mesh=True, exact=True, workers=-1, **kwargs):
+    """
+    Renders a candidate model colored by how far it is from a reference (same palette as the panda3d viewer) and
+    writes it to a png. The candidate is registered to the reference first unless a transform is given. Deviations
+    are exact distances to the reference's surface (its BVH), so differently tessellated copies of the same part
+    don't light up in the middle of their faces. exact=False uses nearest neighbor distances to the reference's
+    vertices instead, which is several times faster but only fair when both models are densely tessellated.
+
+    :param candidate: Shape to draw
+    :param reference: reference Shape
+    :param file_name: location of the png
+    :param match_distance: max deviation drawn as a match, defaults to .001
+    :param approx_distance: max deviation drawn as an approximate match, defaults to .01
+    :param transform: 4x4 transform lining the candidate up with the reference, defaults to None (use register())
+    :param mesh: draw the candidate's faces colored by their worst vertex, otherwise its point cloud, defaults to True
+    :param exact: measure to the reference surface, otherwise to its nearest vertex, defaults to True
+    :param workers: number of threads for the nearest neighbor queries when not exact, defaults to -1 (all cores)
+    :param kwargs: image options passed on to render_mesh() or render_points()
+    :return: the image
+    """
+    if transform is None:
+        transform = candidate.register(reference).transform
+
+    def deviations(points):
+        moved = apply_transform(points, transform)
+        if exact:
+            return reference.get_bvh().closest_points(moved)[0]
+        return reference.get_spatial_index().nearest_distances(moved, workers=workers)
+
+    if mesh and candidate.faces is not None:
+        # color each face by its worst vertex
+        vertices, faces = candidate.get_indexed_mesh()
+        distances = deviations(vertices)
+        colors = deviation_colors(np.max(distances[faces], axis=1), match_distance, approx_distance, ORIG_COLORS)
+        image = render_mesh(candidate.faces, colors, **kwargs)
+    else:
+        distances = deviations(candidate.point_cloud)
+        colors = deviation_colors(distances, match_distance, approx_distance, ORIG_COLORS)
+        image = render_points(candidate.point_cloud, colors, **kwargs)
+
+    write_png(file_name, image)
+    return image
+
+def main():
+    from shape import Shape
+
+    parser = argparse.ArgumentParser(description='Render candidate stls colored by deviation from a reference to png.')
+    parser.add_argument('reference', help='reference stl file')
+    parser.add_argument('candidates', nargs='+', help='candidate stl files')
+    parser.add_argument('-o', '--output-dir', default='.', help='folder for the pngs (default current folder)')
+    parser.add_argument('--match', type=float, default=.001, help='max deviation drawn as a match (default .001)')
+    parser.add_argument('--approx', type=float, default=.01, help='max deviation drawn as approximate (default .01)')
+    parser.add_argument('--size', type=int, nargs=2, default=(800, 600), help='image width and height (default 800 600)')
+    parser.add_argument('--points', action='store_true', help='draw the point cloud instead of the mesh')
+    parser.add_argument('--fast', action='store_true', help='nearest vertex distances instead of exact surface distances')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    reference = Shape(args.reference, verbose=False)
+    start = time.perf_counter()
+    for candidate_file in args.candidates:
+        name = os.path.splitext(os.path.basename(candidate_file))[0]
+        file_name = os.path.join(args.output_dir, f'{name}.png')
+        render_deviation(Shape(candidate_file, verbose=False), reference, file_name, args.match, args.approx,
+                         mesh=not args.points, exact=not args.fast, width=args.size[0], height=args.size[1])
+        print(file_name)
+    print(f'rendered {len(args.candidates)} models in {time.perf_counter()-start:.2f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
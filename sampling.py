@@ -0,0 +1,100 @@
+# ------------------------
+# @file     sampling.py
+# @date     October 2026
+# @author
+# @email
+# @brief    area-weighted point sampling of mesh surfaces, so point counts don't depend on tessellation
+# ------------------------
+
+import numpy as np
+from triangles import TriangleMesh
+from spatial_index import SpatialIndex
+from vertex_sets import vertex_keys
+
+def sample_surface(triangle_mesh, n_points, seed=None, return_faces=False, dtype=np.float64):
+    """
+    Samples points uniformly over the surface of a mesh. Faces are picked with probability proportional to their area,
+    so a big flat face gets as many points as a fillet of the same area made of thousands of tiny triangles.
+
+    :param triangle_mesh: TriangleMesh (or (m,3,3) array) to sample
+    :param n_points: number of points to sample
+    :param seed: random seed, defaults to None
+    :param return_faces: whether to also return the face each point came from, defaults to False
+    :param dtype: float type of the points, defaults to np.float64
+    :return: numpy array of shape (n_points,3), and face indices of shape (n_points,) if return_faces
+    """
+    if not isinstance(triangle_mesh, TriangleMesh):
+        triangle_mesh = TriangleMesh(triangle_mesh)
+    rng = np.random.default_rng(seed)
+
+    total_area = np.sum(triangle_mesh.areas)
+    if total_area <= 0:
+        raise Exception('Mesh has no surface area to sample.')
+    faces = rng.choice(len(triangle_mesh), size=n_points, p=triangle_mesh.areas/total_area)
+
+    # uniform barycentric coordinates (square root trick keeps points from bunching at a corner)
+    r1 = np.sqrt(rng.random(n_points, dtype))
+    r2 = rng.random(n_points, dtype)
+    u = 1-r1
+    v = r1*(1-r2)
+    w = r1*r2
+
+    tri = triangle_mesh.vectors[faces].astype(dtype, copy=False)
+    points = u[:,None]*tri[:,0]
+    points += v[:,None]*tri[:,1]
+    points += w[:,None]*tri[:,2]
+    if return_faces:
+        return points, faces
+    return points
+
+def poisson_disk_sample(triangle_mesh, n_points, radius=None, oversample=4, seed=None, dtype=np.float64):
+    """
+    Approximate Poisson disk sampling of a mesh surface: no two points are closer than radius, so the points are spread
+    out evenly instead of clumping. Candidates are sampled with sample_surface(), thinned to one per grid cell, then any
+    remaining pairs closer than radius are resolved in a few batched rounds.
+
+    :param triangle_mesh: TriangleMesh (or (m,3,3) array) to sample
+    :param n_points: max number of points to return
+    :param radius: min distance between points, defaults to None (estimated from the surface area and n_points)
+    :param oversample: how many candidates to draw per wanted point, defaults to 4
+    :param seed: random seed, defaults to None
+    :param dtype: float type of the points, defaults to np.float64
+    :return: numpy array of shape (k,3) with k <= n_points
+    """
+    if not isinstance(triangle_mesh, TriangleMesh):
+        triangle_mesh = TriangleMesh(triangle_mesh)
+    rng = np.random.default_rng(seed)
+
+    if radius is None:
+        # spacing of n_points packed in a hexagonal pattern over the surface. Random dart throwing only fills about
+        # 60% as densely as hexagonal packing, so shrink it enough to not fall short
+        radius = .6*np.sqrt(2*np.sum(triangle_mesh.areas)/(np.sqrt(3)*n_points))
+
+    # candidates are already in random order, so "first" below means a random pick
+    candidates = sample_surface(triangle_mesh, n_points*oversample, seed=rng, dtype=dtype)
+
+    # a cell this size can only hold one point that is radius away from the rest
+    _, first_in_cell = np.unique(vertex_keys(candidates, radius/np.sqrt(3)), return_index=True)
+    candidates = candidates[np.sort(first_in_cell)]
+
+    # points in neighboring cells can still be too close. Keep the same points a one at a time dart throw would,
+    # but in batched rounds: a point is accepted once no earlier live point conflicts with it, and accepting it
+    # knocks out everything it conflicts with.
+    pairs = SpatialIndex(candidates).tree.query_pairs(radius, output_type='ndarray')
+    first, second = pairs[:,0], pairs[:,1]
+    alive = np.ones(candidates.shape[0], bool)
+    keep = np.zeros(candidates.shape[0], bool)
+    while alive.any():
+        blocked = np.zeros(candidates.shape[0], bool)
+        live_pairs = alive[first] & alive[second]
+        blocked[np.maximum(first, second)[live_pairs]] = True
+        accepted = alive & ~blocked
+        keep |= accepted
+        alive &= ~accepted
+        alive[second[accepted[first]]] = False
+        alive[first[accepted[second]]] = False
+    points = candidates[keep]
+
+    if points.shape[0] > n_points:
+        points = points[rng.choice(points.shape[0], n_points, replace=False)]
+    return points
@@ -6,94 +6,531 @@
 # @brief    for creating/comparing stl models
 # ------------------------
 
-from triangles import Triangle
+from triangles import Triangle, TriangleMesh
+from bvh import BVH
 from stl import mesh
+from stl_reader import BinarySTL, is_binary_stl
+from shape_cache import get_default_cache
 import numpy as np
-from procrustes import generic, rotational
+from spatial_index import SpatialIndex, voxel_downsample
+from registration import ICPRegistration, AlignmentStatistics, apply_transform
+from alignment import initial_alignment
+from fingerprint import Fingerprint, compute_fingerprint, FINGERPRINT_VERSION, DEFAULT_THRESHOLD
+from metrics import cloud_metrics, nearest_distances
+from sampling import sample_surface, poisson_disk_sample
+from vertex_sets import isin_vertices
+from instrumentation import NULL_INSTRUMENTATION
+from topology import weld_vertices, index_faces, is_closed, label_regions, region_statistics
 
 class Shape:
-    def __init__(self, stl_file):
-        self.faces = []       # list of triangles
+    def __init__(self, stl_file, loader='mmap', cache=None, verbose=True, instrumentation=None, sample_points=None,
+                 sample_mode='uniform', sample_seed=0, dtype=None, weld_eps=None):
+        """
+        Load a model from a stl file.
+
+        :param stl_file: string location of stl file, None for an empty shape (see from_point_cloud())
+        :param loader: 'mmap' or 'numpy-stl', see open_stl_file(), defaults to 'mmap'
+        :param cache: ShapeCache to load/save preprocessed data with, False to not cache, defaults to None (shared default cache)
+        :param verbose: whether to print progress, defaults to True
+        :param instrumentation: Instrumentation to record stage timings to, defaults to None (off)
+        :param sample_points: use this many points sampled over the surface instead of the mesh vertices, see resample(), defaults to None (vertices)
+        :param sample_mode: 'uniform' or 'poisson', defaults to 'uniform'
+        :param sample_seed: random seed for sampling, defaults to 0
+        :param weld_eps: distance within which vertices are merged into one, defaults to None (only exactly equal vertices)
+        :param dtype: np.float32 to keep point clouds, face properties and comparison results in single precision (about half the memory), defaults to None (float64 face properties, points as stored)
+        """
+        self.faces = None     # TriangleMesh of all triangles
         self.point_cloud = [] # list of vertices with no duplicates
         self.approx_thresh = 10
-
-        print(f'Starting {stl_file} ...')
-        self.open_stl_file(stl_file)
+        self._spatial_index = None  # built on demand by get_spatial_index()
+        self._levels = {}           # voxel size -> downsampled cloud, see get_level()
+        self._bvh = None            # built on demand by get_bvh()
+        self._indexed_mesh = None   # (vertices, face vertex indices), set when loading, see get_indexed_mesh()
+        self._fingerprint = None    # computed on demand by get_fingerprint()
+        self._closed = None         # whether the mesh is watertight, checked on demand by is_closed()
+        self._cache = None
+        self._cache_key = None
+        self._index_name = 'spatial_index'  # what the spatial index is cached as, None to not cache it
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.weld_eps = weld_eps
+        self.verbose = verbose
+        self.instrumentation = NULL_INSTRUMENTATION if instrumentation is None else instrumentation
+
+        if stl_file is None:
+            return
+
+        self._log(f'Starting {stl_file} ...')
+        if cache is False:
+            self.open_stl_file(stl_file, loader)
+        else:
+            self._cache = get_default_cache() if cache is None else cache
+            # face properties are stored in the working precision, only add parameters that were changed from the defaults
+            params = {}
+            if self.dtype is not None:
+                params['dtype'] = self.dtype.name
+            if self.weld_eps:
+                params['weld_eps'] = self.weld_eps
+            self._cache_key = self._cache.key(stl_file, **params)
+            if not self.load_from_cache():
+                self.open_stl_file(stl_file, loader)
+                self.save_to_cache()
+
+        if sample_points is not None:
+            self.resample(sample_points, sample_mode, sample_seed)
     
-    def open_stl_file(self, stl_file):
+    @classmethod
+    def from_point_cloud(cls, point_cloud, faces=None, verbose=True, instrumentation=None, dtype=None):
         """
-        Open a STL file and load each triangle into faces list and get list with no duplicates into point_cloud
+        Create a shape from arrays that are already loaded, without reading a file or using the cache.
+
+        :param point_cloud: numpy array of shape (n,3) of vertices with no duplicates
+        :param faces: optional TriangleMesh, defaults to None
+        :param verbose: whether to print progress, defaults to True
+        :param instrumentation: Instrumentation to record stage timings to, defaults to None (off)
+        :param dtype: working precision, see __init__(), defaults to None
+        :return: Shape
+        """
+        shape = cls(None, cache=False, verbose=verbose, instrumentation=instrumentation, dtype=dtype)
+        shape.point_cloud = shape._as_dtype(point_cloud)
+        shape.faces = faces
+        return shape
 
-        :param stl_file: string location of stl file
+    def _as_dtype(self, array):
+        # no copy if the array is already in the working precision
+        return array if self.dtype is None else np.asarray(array).astype(self.dtype, copy=False)
+
+    def _float_dtype(self):
+        # precision to compute new arrays in
+        return np.float64 if self.dtype is None else self.dtype
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def open_stl_file(self, stl_file, loader='mmap'):
         """
+        Open a STL file and load all triangles into a TriangleMesh and get list with no duplicates into point_cloud.
+        Duplicates are welded with a hash table (see topology.weld_vertices()), which also gives the indexed mesh.
 
-        model_mesh = mesh.Mesh.from_file(stl_file)
-        
-        # triangles not needed with procrustes comparison
-        # # set faces
-        # print(f'-- Grabbing {model_mesh.data['vectors'].shape[0]} triangles...')
-        # for vector in model_mesh.data['vectors']:
-        #     self.faces.append(Triangle(vector))
-        
-        # print(f'vector shape: {model_mesh.data['vectors'].shape}')
-        # print(f'faces shape: {len(self.faces)}')
-        # print(f'first face: {self.faces[0]}')
+        :param stl_file: string location of stl file
+        :param loader: 'mmap' to memory map binary files without copying (ascii files fall back to numpy-stl), or 'numpy-stl', defaults to 'mmap'
+        """
+        with self.instrumentation.stage('load', loader=loader) as record:
+            if loader == 'mmap' and is_binary_stl(stl_file):
+                vectors = BinarySTL(stl_file).vectors
+            else:
+                vectors = mesh.Mesh.from_file(stl_file).data['vectors']
+            
+            # set faces
+            self._log(f'-- Grabbing {vectors.shape[0]} triangles...')
+            self.faces = TriangleMesh(vectors, self._float_dtype())
+            record.note(faces=vectors.shape[0])
 
         # set vertex list
         # get list of vertices
-        print(f'-- Getting point cloud...')
-        self.point_cloud = np.copy(model_mesh.data['vectors'])
-        # make 1x3 dimensional list instead of 3x3
-        self.point_cloud = np.reshape(self.point_cloud, (self.point_cloud.shape[0]*self.point_cloud.shape[1], 3))
-        # remove duplicate values
-        self.point_cloud = np.unique(self.point_cloud, axis=0)
+        self._log(f'-- Getting point cloud...')
+        with self.instrumentation.stage('dedup', points=vectors.shape[0]*vectors.shape[1]) as record:
+            # remove duplicate values, and keep which vertex each corner of each face became
+            vertices, index = weld_vertices(vectors, self.weld_eps)
+            self.point_cloud = self._as_dtype(vertices)
+            record.note(unique_points=self.point_cloud.shape[0])
+        self._spatial_index = None
+        self._levels = {}
+        self._bvh = None
+        self._indexed_mesh = (self.point_cloud, index.reshape(-1, 3))
+        self._fingerprint = None
+        self._closed = None
+
+    def load_from_cache(self):
+        """
+        Load the point cloud and face arrays from the cache (memory mapped, read only).
 
-    def compare_with_procrustes(self, other_shape, scale=False, threshhold=.005, rounding=4):
+        :return: True if the shape was cached
+        """
+        with self.instrumentation.stage('cache_load') as record:
+            arrays = self._cache.load(self._cache_key)
+            record.note(hit=arrays is not None)
+        if arrays is None:
+            return False
+        self._log(f'-- Loaded from cache ({self._cache_key[:8]})')
+        self.faces = TriangleMesh.from_arrays(arrays['vectors'], arrays['edges'], arrays['areas'], arrays['normals'], arrays['centroids'])
+        self.point_cloud = arrays['point_cloud']
+        self._spatial_index = None
+        self._levels = {}
+        self._bvh = None
+        self._indexed_mesh = (self.point_cloud, arrays['face_indices'])
+        self._fingerprint = None
+        self._closed = None
+        return True
+
+    def save_to_cache(self):
+        """
+        Save the point cloud and face arrays to the cache.
+        """
+        self._cache.store(self._cache_key, {
+            'point_cloud': self.point_cloud,
+            'vectors': self.faces.vectors,
+            'edges': self.faces.edges,
+            'areas': self.faces.areas,
+            'normals': self.faces.normals,
+            'centroids': self.faces.centroids,
+            'face_indices': self._indexed_mesh[1],
+        })
+
+    def resample(self, n_points, mode='uniform', seed=0):
         """
-        Compares 2 point clouds using the Procrustes method. Then compares computed point clouds to see how close each model is. Also computes frobenius norm, and root mean squared error. Accuracy score is based off threshold passed in. Can include scaling or not (see procrustes for more explanation). 
+        Replace point_cloud with a fixed number of points sampled over the surface, weighted by face area. This makes
+        comparison cost depend on n_points instead of how finely the model was tessellated.
 
-        # NOTES: threshhold of approximate closeness needs adjusting. Not accurate for all models. Need way to measure accurate measure also.
+        :param n_points: number of points to sample
+        :param mode: 'uniform' for area weighted random points, 'poisson' for evenly spread points (at most n_points), defaults to 'uniform'
+        :param seed: random seed, None for a different sample every time, defaults to 0
+        :raises Exception: if there are no faces or the mode is unknown
+        """
+        if self.faces is None:
+            raise Exception('Shape has no faces to sample.')
+        with self.instrumentation.stage('sampling', mode=mode) as record:
+            if mode == 'uniform':
+                self.point_cloud = sample_surface(self.faces, n_points, seed, dtype=self._float_dtype())
+            elif mode == 'poisson':
+                self.point_cloud = poisson_disk_sample(self.faces, n_points, seed=seed, dtype=self._float_dtype())
+            else:
+                raise Exception(f"Unknown sample mode '{mode}'. Use 'uniform' or 'poisson'.")
+            record.note(points=self.point_cloud.shape[0])
+        self._log(f'-- Sampled {self.point_cloud.shape[0]} points ({mode})')
 
-        :param other_shape: model to compare to, used as reference model
-        :param scale: whether or not to allow scaling, defaults to False
-        :param threshhold: determines how close points are to determine if they 'match' for accuracy score, defaults to .005
-        :param rounding: how many decimals to round to, defaults to 4
-        :return: frobenius norm, root mean squared error, 'accuracy' score
+        self._spatial_index = None
+        self._levels = {}
+        # same seed gives the same points, so the index can still be cached
+        self._index_name = None if seed is None else f'spatial_index_{mode}_{n_points}_{seed}'
+
+    def get_spatial_index(self):
+        """
+        Get the spatial index over point_cloud. It is built the first time it is needed and reused after that.
+
+        :return: SpatialIndex of point_cloud
+        """
+        cacheable = self._cache is not None and self._index_name is not None
+        if self._spatial_index is None and cacheable:
+            self._spatial_index = self._cache.load_object(self._cache_key, self._index_name)
+        if self._spatial_index is None:
+            with self.instrumentation.stage('spatial_index', points=len(self.point_cloud)):
+                self._spatial_index = SpatialIndex(self.point_cloud)
+            if cacheable:
+                self._cache.store_object(self._cache_key, self._index_name, self._spatial_index)
+        return self._spatial_index
+
+    def get_bvh(self):
+        """
+        Get the bounding volume hierarchy over the faces. It is built the first time it is needed and reused after that.
+
+        :raises Exception: if the shape has no faces
+        :return: BVH of faces
+        """
+        if self.faces is None:
+            raise Exception('Shape has no faces to build a BVH over.')
+        if self._bvh is None:
+            with self.instrumentation.stage('bvh', faces=len(self.faces)):
+                self._bvh = BVH(self.faces)
+        return self._bvh
+
+    def get_fingerprint(self):
+        """
+        Get the global shape descriptors of this model (see fingerprint.py). Computed once from the faces and kept with
+        the shape, and in the cache when there is one.
+
+        :raises Exception: if the shape has no faces
+        :return: Fingerprint
+        """
+        if self._fingerprint is None and self._cache is not None:
+            arrays = self._cache.load_arrays(self._cache_key, 'fingerprint')
+            if arrays is not None:
+                fingerprint = Fingerprint.from_arrays(arrays)
+                if fingerprint.version == FINGERPRINT_VERSION:
+                    self._fingerprint = fingerprint
+        if self._fingerprint is None:
+            if self.faces is None:
+                raise Exception('Shape has no faces to compute a fingerprint from.')
+            with self.instrumentation.stage('fingerprint', faces=len(self.faces)):
+                self._fingerprint = compute_fingerprint(self.faces, closed=self.is_closed())
+            if self._cache is not None:
+                self._cache.store_arrays(self._cache_key, 'fingerprint', self._fingerprint.to_arrays())
+        return self._fingerprint
+
+    def fingerprint_distance(self, other_shape):
+        """
+        Cheap distance between the global descriptors of two shapes, independent of their pose.
+
+        :param other_shape: model to compare to
+        :return: distance, 0 for identical models
+        """
+        return self.get_fingerprint().distance(other_shape.get_fingerprint())
+
+    def needs_full_comparison(self, other_shape, threshold=DEFAULT_THRESHOLD):
         """
-        result = rotational(self.point_cloud, other_shape.point_cloud, translate=True, scale=scale)
-        frob_error = np.round(result.error, 4)
+        Whether two shapes are close enough that a full comparison (registration and scoring) is worth doing. Shapes
+        that fail this are clearly different models.
 
-        # new reference matrix
-        new_b = np.round(result.new_b, rounding)
+        :param other_shape: model to compare to
+        :param threshold: max fingerprint distance, defaults to fingerprint.DEFAULT_THRESHOLD
+        :return: True if the fingerprints are within threshold
+        """
+        distance = self.fingerprint_distance(other_shape)
+        self._log(f'-- fingerprint distance: {distance:.4f}')
+        return distance <= threshold
 
-        # transformed matrix p
-        transformed = np.dot(result.new_a, result.t)
-        transformed = np.round(transformed, rounding)
+    def get_indexed_mesh(self):
+        """
+        Get the faces as an indexed mesh (unique vertices plus 3 vertex indices per face), built once and reused.
 
-        # get error for every value
-        error = transformed-result.new_b
-        error = np.round(error, rounding)
-        print(error)
+        :raises Exception: if the shape has no faces
+        :return: vertices of shape (k,3), faces of shape (m,3)
+        """
+        if self.faces is None:
+            raise Exception('Shape has no faces to index.')
+        if self._indexed_mesh is None:
+            with self.instrumentation.stage('index_faces', faces=len(self.faces)):
+                self._indexed_mesh = index_faces(self.faces.vectors, self.weld_eps)
+        return self._indexed_mesh
+
+    def is_closed(self):
+        """
+        Whether the mesh is watertight, every edge shared by exactly 2 faces (see topology.is_closed()). Checked once
+        on the indexed mesh and reused.
 
-        # get root mean squared error (standard deviation of all errors)
-        rmse = np.sqrt(np.mean(np.sum((error)**2, axis=1)))
-        rmse = np.round(rmse, rounding)
+        :return: True if closed, False if open or there are no faces
+        """
+        if self.faces is None:
+            return False
+        if self._closed is None:
+            self._closed = is_closed(self.get_indexed_mesh()[1])
+        return self._closed
 
-        # give accuracy measure
-        # find error=0
-        matched = transformed == new_b
-        count_matched = np.count_nonzero(matched.all(1))
+    def get_level(self, voxel_size):
+        """
+        Get the point cloud downsampled to one point per voxel. Each level is built once and cached.
 
-        approx_match = error <= rmse
-        count_approx_match = np.count_nonzero(approx_match.all(1))
+        :param voxel_size: edge length of the voxels
+        :return: downsampled point cloud
+        """
+        if voxel_size not in self._levels:
+            self._levels[voxel_size] = voxel_downsample(self.point_cloud, voxel_size)
+        return self._levels[voxel_size]
 
-        comparison_score = np.round(count_approx_match/transformed.shape[0],rounding)
+    def get_pyramid_voxel_sizes(self, levels=3, coarsest_fraction=1/32):
+        """
+        Voxel sizes for a coarse to fine pyramid, based on the size of the model. Each level halves the voxel size.
 
-        
+        :param levels: number of downsampled levels, defaults to 3
+        :param coarsest_fraction: voxel size of the coarsest level as a fraction of the bounding box diagonal, defaults to 1/32
+        :return: list of voxel sizes, coarsest first
+        """
+        diagonal = np.linalg.norm(np.ptp(self.point_cloud, axis=0))
+        if diagonal == 0:
+            return []
+        return [diagonal*coarsest_fraction/(2**i) for i in range(levels)]
+
+    def find_correspondences(self, other_shape, k=1):
+        """
+        Finds the nearest point(s) in the other shape for every point in this shape.
+
+        :param other_shape: model to find correspondences in
+        :param k: number of neighbors to find for each point, defaults to 1
+        :return: distances and indices into other_shape.point_cloud, of shape (n,) if k is 1 else (n,k)
+        """
+        if k == 1:
+            return other_shape.get_spatial_index().nearest(self.point_cloud)
+        return other_shape.get_spatial_index().knn(self.point_cloud, k)
+
+    def initial_alignment(self, other_shape):
+        """
+        Rough rigid transform that lines this shape up with another by matching their centroids and principal axes,
+        from the mesh mass properties when the mesh is closed and the point covariance otherwise. See alignment.py.
+
+        :param other_shape: model to align to, used as reference model
+        :return: 4x4 transformation matrix
+        """
+        with self.instrumentation.stage('alignment', points=len(self.point_cloud)):
+            transform = initial_alignment(self.point_cloud, other_shape.get_spatial_index(), self.faces, other_shape.faces,
+                                          source_closed=self.is_closed(), target_closed=other_shape.is_closed())
+        return transform
+
+    def register(self, other_shape, max_iterations=50, tolerance=1e-6, initial_transform=None, levels=3, prealign=True):
+        """
+        Finds the rigid transform that lines this shape up with another shape using ICP. Registration starts on
+        coarse voxel downsampled copies of this shape and is refined level by level, finishing with one pass at full
+        resolution. Every level is matched against the other shape's cached spatial index so repeated registrations
+        don't rebuild it.
+
+        :param other_shape: model to align to, used as reference model
+        :param max_iterations: stop each level after this many iterations, defaults to 50
+        :param tolerance: stop each level when the rmse improves by less than this, defaults to 1e-6
+        :param initial_transform: 4x4 starting guess, defaults to None (see prealign)
+        :param levels: number of downsampled levels before full resolution, 0 for full resolution only, defaults to 3
+        :param prealign: without an initial_transform, start from initial_alignment() instead of the identity, defaults to True
+        :return: RegistrationResult with the transform, rmse, and per-iteration costs and timings
+        """
+        if initial_transform is None and prealign:
+            initial_transform = self.initial_alignment(other_shape)
+
+        # only this shape is downsampled, every level is matched against the full reference. Pairing voxel centroids
+        # with voxel centroids pulls the fit towards wherever the two grids line up instead of the surfaces
+        target = other_shape.get_spatial_index()
+        pyramid = [(self.get_level(voxel_size), target) for voxel_size in other_shape.get_pyramid_voxel_sizes(levels)]
+        pyramid.append((self.point_cloud, target))
+
+        with self.instrumentation.stage('registration', points=len(self.point_cloud), levels=len(pyramid)) as record:
+            icp = ICPRegistration(max_iterations=max_iterations, tolerance=tolerance)
+            result = icp.register_pyramid(pyramid, initial_transform)
+            record.note(iterations=result.iterations, rmse=float(result.rmse))
+        self._log(f'-- ICP: {result.level_iterations} iterations per level, rmse {result.rmse:.6f}, {sum(result.timings):.3f}s')
+        return result
+
+    def distance_metrics(self, other_shape, transform=None, workers=None):
+        """
+        Chamfer, hausdorff and percentile deviations between this shape and another, using nearest neighbors instead
+        of pairing points by index. Pass the transform from register() to measure the aligned shapes.
 
-        print(f'matched: {count_matched} approx match: {count_approx_match}')
-        print(f'total: {transformed.shape[0]}')
-        print(f'Frobenius score: {frob_error} RMSE: {rmse} Score: {comparison_score*100}%')
+        :param other_shape: model to compare to, used as reference model
+        :param transform: 4x4 transform to apply to this shape first, defaults to None
+        :param workers: number of threads for the nearest neighbor queries, defaults to None (one per core)
+        :return: dict of metrics, see metrics.cloud_metrics()
+        """
+        with self.instrumentation.stage('scoring', method='metrics', points=len(self.point_cloud)):
+            cloud = self.point_cloud if transform is None else apply_transform(self.point_cloud, transform)
+            result = cloud_metrics(cloud, other_shape, workers=workers)
+        self._log(f"-- chamfer: {result['chamfer']:.6f} hausdorff: {result['hausdorff']:.6f}")
+        return result
+
+    def surface_deviation(self, other_shape, transform=None, signed=False):
+        """
+        Exact distance from every point of this shape to the surface of another shape (not just its vertices), so
+        differently tessellated models don't look further apart than they are.
+
+        :param other_shape: model whose surface to measure to, used as reference model
+        :param transform: 4x4 transform to apply to this shape first, like the one from register(), defaults to None
+        :param signed: make distances negative behind the other shape's faces, defaults to False
+        :return: distances of shape (n,) and the index of the closest face of other_shape for each point
+        """
+        bvh = other_shape.get_bvh()
+        with self.instrumentation.stage('scoring', method='surface', points=len(self.point_cloud)):
+            cloud = self.point_cloud if transform is None else apply_transform(self.point_cloud, transform)
+            if signed:
+                distances, faces = bvh.signed_distances(cloud)
+            else:
+                distances, faces, _ = bvh.closest_points(cloud)
+        self._log(f'-- surface deviation: mean {np.mean(np.abs(distances)):.6f} max {np.max(np.abs(distances)):.6f}')
+        return distances, faces
+
+    def deviation_regions(self, other_shape, threshhold=.005, transform=None):
+        """
+        Finds where this shape differs from another. Every mesh vertex further than threshhold from the other shape's
+        surface is flagged, and flagged vertices joined by mesh edges are grouped into regions (see topology.py).
+
+        :param other_shape: model to compare to, used as reference model
+        :param threshhold: surface distance above which a vertex counts as changed, defaults to .005
+        :param transform: 4x4 transform lining this shape up with the other, defaults to None (found with register())
+        :return: list of region dicts (see topology.region_statistics(), bounding boxes in this shape's coordinates), region label of every vertex and every face of get_indexed_mesh()
+        """
+        if transform is None:
+            transform = self.register(other_shape).transform
+        vertices, faces = self.get_indexed_mesh()
+        bvh = other_shape.get_bvh()
+        with self.instrumentation.stage('scoring', method='regions', points=vertices.shape[0]) as record:
+            deviations, _, _ = bvh.closest_points(apply_transform(vertices, transform))
+            vertex_labels, face_labels = label_regions(faces, deviations > threshhold)
+            regions = region_statistics(vertices, faces, vertex_labels, face_labels, deviations, self.faces.areas)
+            record.note(regions=len(regions))
+
+        self._log(f'-- {len(regions)} regions differ by more than {threshhold}')
+        for region in regions[:10]:
+            self._log(f"   {region['faces']} faces, max deviation {region['max_deviation']:.4f}, "
+                      f"bbox {np.round(region['bbox_min'], 3)} to {np.round(region['bbox_max'], 3)}")
+        return regions, vertex_labels, face_labels
+
+    def compare_with_procrustes(self, other_shape, scale=False, threshhold=.005, rounding=4, chunk_size=1<<18,
+                                max_iterations=50, tolerance=1e-6):
+        """
+        Compares 2 point clouds using a Procrustes fit. Then compares computed point clouds to see how close each model is. Also computes frobenius norm, and root mean squared error. Accuracy score is based off threshold passed in. Can include scaling or not.
+
+        The fit is streamed: after a principal axes alignment, points are paired with their nearest neighbor in the other shape a chunk at a time, and only the 3x3 sums needed for the closed form solution are kept (see registration.AlignmentStatistics). Pairing and fitting repeat until the rmse stops improving. Nothing is padded and the registration takes the same memory for any model size.
+
+        # NOTES: threshhold of approximate closeness needs adjusting. Not accurate for all models. Need way to measure accurate measure also.
+
+        :param other_shape: model to compare to, used as reference model
+        :param scale: whether or not to allow scaling, defaults to False
+        :param threshhold: determines how close points are to determine if they 'match' for accuracy score, defaults to .005
+        :param rounding: how many decimals to round to, defaults to 4
+        :param chunk_size: points read at a time, defaults to 262,144
+        :param max_iterations: stop refitting after this many iterations, defaults to 50
+        :param tolerance: stop refitting when the rmse improves by less than this, defaults to 1e-6
+        :return: per coordinate approx match and match masks of shape (n,3), transformed points of shape (n,3)
+        """
+        index = other_shape.get_spatial_index()
+        reference = other_shape.point_cloud
+        n = len(self.point_cloud)
+        chunks = [slice(start, start+chunk_size) for start in range(0, n, chunk_size)]
+
+        # rows of the two clouds don't correspond, so pair points by nearest neighbor from matching principal axes
+        start_transform = self.initial_alignment(other_shape)
+        with self.instrumentation.stage('registration', points=n) as record:
+            # re-pair and refit until the error stops improving, one fit from the rough prealignment isn't enough
+            transform = start_transform
+            previous_rmse = np.inf
+            for iteration in range(1, max_iterations+1):
+                stats = AlignmentStatistics()
+                for chunk in chunks:
+                    moved = apply_transform(self.point_cloud[chunk], transform)
+                    _, idx = index.nearest(moved)
+                    stats.add(moved, reference[idx])
+                step = stats.solve(scale)
+                squared_error = stats.sum_squared_error(step)
+                transform = step @ transform
+                fit_rmse = np.sqrt(squared_error/stats.weight) if stats.weight > 0 else 0.0
+                if previous_rmse - fit_rmse < tolerance:
+                    break
+                previous_rmse = fit_rmse
+            frob_error = np.round(squared_error, 4)
+            record.note(iterations=iteration)
+        self._log(f'-- Procrustes: {iteration} iterations')
+
+        with self.instrumentation.stage('scoring', method='procrustes', points=n):
+            # transformed matrix p, and the closest reference point to each of its points
+            transformed = np.empty((n, 3), self._float_dtype())
+            nearest = np.empty(n, np.intp)
+            squared_error = 0.0
+            for chunk in chunks:
+                apply_transform(self.point_cloud[chunk], transform, out=transformed[chunk])
+                np.round(transformed[chunk], rounding, out=transformed[chunk])
+                _, nearest[chunk] = index.nearest(transformed[chunk])
+                error = transformed[chunk]-reference[nearest[chunk]]
+                np.round(error, rounding, out=error)
+                squared_error += np.einsum('ij,ij->', error, error, dtype=np.float64)
+
+            # get root mean squared error (standard deviation of all errors)
+            rmse = np.round(np.sqrt(squared_error/n), rounding) if n else 0.0
+
+            # give accuracy measure
+            matched = np.empty((n, 3), bool)
+            approx_match = np.empty((n, 3), bool)
+            for chunk in chunks:
+                # new reference matrix
+                new_b = reference[nearest[chunk]]
+                error = transformed[chunk]-new_b
+                np.round(new_b, rounding, out=new_b)
+                # find error=0
+                matched[chunk] = transformed[chunk] == new_b
+                np.round(error, rounding, out=error)
+                np.abs(error, out=error)
+                approx_match[chunk] = error <= rmse
+
+            count_matched = np.count_nonzero(matched.all(1))
+            count_approx_match = np.count_nonzero(approx_match.all(1))
+            comparison_score = np.round(count_approx_match/n, rounding) if n else 0.0
+
+            self._log(f'matched: {count_matched} approx match: {count_approx_match}')
+            self._log(f'total: {n}')
+            self._log(f'Frobenius score: {frob_error} RMSE: {rmse} Score: {comparison_score*100}%')
         return approx_match, matched, transformed
         # return frob_error, rmse, comparison_score
 
@@ -105,86 +542,72 @@ class Shape:
         :param q_cloud: point cloud of another shape
         :returns
         """
-        # model2_dup = []
-        # model2_no_dup = []
-        model2_dup = np.empty((0,3))
-        model2_no_dup = np.empty((0,3))
-        print(f'other point cloud size: {q_cloud.shape[0]}')
-        print(f'my point cloud size: {self.point_cloud.shape[0]}')
-
-        total_verts = 0
-        for vert in q_cloud:
-            total_verts += 1
-            if (vert==self.point_cloud).all(1).any():
-                # model2_dup.append(vert)
-                model2_dup = np.vstack((model2_dup, vert))
-            else:
-                # model2_no_dup.append(vert)
-                model2_no_dup = np.vstack((model2_no_dup, vert))
-        
-        for vert in self.point_cloud:
-            if not (vert==q_cloud).all(1).any():
-                total_verts += 1
-                
+        self._log(f'other point cloud size: {q_cloud.shape[0]}')
+        self._log(f'my point cloud size: {self.point_cloud.shape[0]}')
+
+        is_dup = isin_vertices(q_cloud, self.point_cloud)
+        model2_dup = q_cloud[is_dup]
+        model2_no_dup = q_cloud[~is_dup]
+
+        total_verts = q_cloud.shape[0] + np.count_nonzero(~isin_vertices(self.point_cloud, q_cloud))
+
         # print(f'dups: {len(model2_dup)} no dups: {len(model2_no_dup)}')
-        print(f'dups: {model2_dup.shape[0]} no dups: {model2_no_dup.shape[0]} ({total_verts})')
+        self._log(f'dups: {model2_dup.shape[0]} no dups: {model2_no_dup.shape[0]} ({total_verts})')
         return model2_no_dup, model2_dup, total_verts
 
     def compare_point_clouds(self, other_shape):
-        padding = np.zeros(( np.abs(self.point_cloud.shape[0]-other_shape.point_cloud.shape[0]), 3))
-        orig_cloud = self.point_cloud
-        other_cloud = other_shape.point_cloud
-        # if orig smaller than other
-        if orig_cloud.shape[0] < other_cloud.shape[0]:
-            print('orig is smaller')
-            orig_cloud = np.concatenate((orig_cloud, padding))
-        else:
-            print('other cloud smaller')
-            other_cloud = np.concatenate((other_cloud, padding))
+        """
+        Registers this shape onto another (see register()) and checks how close every point lands to the other shape.
+        Points are compared to their nearest neighbor, so the clouds don't need padding to the same size.
 
-        squared_dist = np.sum((self.point_cloud-other_cloud)**2, axis=1)
-        dist = np.sqrt(squared_dist)
+        :param other_shape: model to compare to, used as reference model
+        :return: masks of points within .001 (matched) and within .01 (approximately matched), each of shape (n,)
+        """
+        result = self.register(other_shape)
+        with self.instrumentation.stage('scoring', method='nearest', points=len(self.point_cloud)):
+            dist = nearest_distances(result.apply(self.point_cloud), other_shape)
 
         matched = dist <= .001
         approx_match = dist <= .01
         no_match = dist > .01
 
-        print(dist[matched])
         return matched, approx_match
     
     def compare_shapes(self, other_shape, athresh=None):
-        # DEPRACATED WITH ADDITION OF PROCRUSTES
+        """
+        Compares the vertices of another shape to the faces of this shape. Vertices shared by both shapes count as
+        matched, vertices lying on one of this shape's faces are matched, and vertices within athresh of a face are
+        approximately matched (worth half a point).
+
+        :param other_shape: model to compare to
+        :param athresh: distance to a face that counts as approximately close, defaults to self.approx_thresh
+        :return: score as a percentage
+        """
         if athresh is None:
             athresh=self.approx_thresh
-        print('starting comparison...')
-        list_no_dups, list_dups, total_points = self.remove_dup_points_from_point_cloud(other_shape.point_cloud)
-        match_list = np.empty((0,3))
-        approx_list = np.empty((0,3))
-        no_match_list = np.empty((0,3))
-
-        print(len(self.faces))
-        for i, vert in enumerate(list_no_dups):
-            for j in range(i-10, i+10):
-            # for j, face in enumerate(self.faces):
-                isIn = self.faces[j].isPointInTriangle(vert)
-                if isIn:
-                    match_list = np.vstack((match_list, vert))
-                    break
-                else:
-                    isClose = self.faces[j].isPointCloseToTriangle(vert, athresh)
-                    if isClose:
-                        approx_list = np.vstack((approx_list, vert))
-                        break
-                    # else:
-                    #     no_match_list = np.vstack((no_match_list, vert))
+        self._log('starting comparison...')
+        with self.instrumentation.stage('dedup', points=len(other_shape.point_cloud)):
+            list_no_dups, list_dups, total_points = self.remove_dup_points_from_point_cloud(other_shape.point_cloud)
+
+        self._log(len(self.faces))
+        with self.instrumentation.stage('scoring', method='triangles', points=len(list_no_dups)):
+            # exact closest face for each vertex
+            dist, _, _ = self.get_bvh().closest_points(list_no_dups)
+            inside = dist <= 1e-6
+
+        match_list = list_no_dups[inside]
+        approx_list = list_no_dups[~inside & (dist <= athresh)]
+        no_match_list = list_no_dups[dist > athresh]
         
-        print(f'matched: {match_list.shape[0]}')
-        print(f'approximately close within {athresh}: {approx_list.shape[0]}')
-        # print(f'not close or matched: {no_match_list.shape[0]}')
+        self._log(f'matched: {match_list.shape[0]}')
+        self._log(f'approximately close within {athresh}: {approx_list.shape[0]}')
+        self._log(f'not close or matched: {no_match_list.shape[0]}')
 
         # total_points = list_dups.shape[0] + list_no_dups.shape[0]
         total_matched_or_close = list_dups.shape[0] + match_list.shape[0] + (approx_list.shape[0]*.5)
-        print(f'score: {total_matched_or_close}/{total_points}={(total_matched_or_close/total_points)*100:.2f}%')
+        score = (total_matched_or_close/total_points)*100
+        self._log(f'score: {total_matched_or_close}/{total_points}={score:.2f}%')
+        return score
             
 
 # # --------- testing ----------
@@ -0,0 +1,263 @@
+# ------------------------
+# @file     shape_cache.py
+# @date     October 2026
+# @author
+# @email
+# @brief    on-disk cache of preprocessed shape data (point clouds, face arrays, spatial indexes)
+# ------------------------
+
+import os
+import json
+import shutil
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+
+# bump when the cached preprocessing changes so old entries are not used
+CACHE_VERSION = 2
+
+def hash_file(file_name, block_size=1<<20):
+    """
+    sha1 hash of a file's contents, read in blocks so big files don't need to fit in memory.
+
+    :param file_name: string location of the file
+    :param block_size: bytes to read at a time, defaults to 1MB
+    :return: hex digest string
+    """
+    sha = hashlib.sha1()
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+class ShapeCache:
+    def __init__(self, cache_dir=None, max_bytes=2*1024**3):
+        """
+        Cache of preprocessed shape data kept on disk as .npy files, so they can be memory mapped straight back in.
+        Entries are keyed by the hash of the stl file contents plus the preprocessing parameters, and the least recently
+        used entries are removed once the cache grows past max_bytes.
+
+        Spatial indexes are stored pickled (see load_object()), and unpickling runs whatever the file says, so the
+        cache folder must only be writable by users you trust. A new folder is created readable by its owner only.
+
+        :param cache_dir: folder to keep the cache in, defaults to $SHAPE_CACHE_DIR or .shape_cache
+        :param max_bytes: max total size of the cache, defaults to 2GB
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get('SHAPE_CACHE_DIR', '.shape_cache')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+
+        # file path -> (size, mtime, content hash), so a warm lookup doesn't have to reread the whole file
+        self._files_path = os.path.join(self.cache_dir, 'files.json')
+
+    def _load_file_hashes(self):
+        try:
+            with open(self._files_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def content_hash(self, stl_file):
+        """
+        Hash of a file's contents. The hash is remembered with the file's size and modification time so it is only
+        recalculated when the file changes.
+
+        :param stl_file: string location of stl file
+        :return: hex digest string
+        """
+        path = os.path.abspath(stl_file)
+        stat = os.stat(path)
+        hashes = self._load_file_hashes()
+        known = hashes.get(path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hash_file(path)
+        hashes[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        tmp = self._files_path + f'.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(hashes, f)
+        os.replace(tmp, self._files_path)
+        return digest
+
+    def key(self, stl_file, **params):
+        """
+        Cache key for a file and the parameters used to preprocess it.
+
+        :param stl_file: string location of stl file
+        :param params: preprocessing parameters that change the cached data
+        :return: hex digest string
+        """
+        params = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(f'{CACHE_VERSION}:{self.content_hash(stl_file)}:{params}'.encode()).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key, mmap_mode='r'):
+        """
+        Load the arrays of a cache entry, memory mapped by default.
+
+        :param key: cache key
+        :param mmap_mode: passed to np.load, defaults to 'r'
+        :return: dict of name -> array, or None if the entry isn't cached (or is evicted while reading)
+        """
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            return None
+        arrays = {}
+        try:
+            for file_name in os.listdir(entry):
+                if file_name.endswith('.npy'):
+                    arrays[file_name[:-4]] = np.load(os.path.join(entry, file_name), mmap_mode=mmap_mode)
+            # mark as recently used
+            os.utime(entry)
+        except (OSError, ValueError):
+            # another process evicted the entry, count it as a miss
+            return None
+        return arrays
+
+    def load_arrays(self, key, name):
+        """
+        Load a group of small arrays stored with store_arrays(). Read without pickle, so this is safe on any cache
+        folder.
+
+        :param key: cache key
+        :param name: name the arrays were stored under
+        :return: dict of name -> array, or None if they aren't cached
+        """
+        path = os.path.join(self._entry_dir(key), f'{name}.npz')
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                return {field: saved[field] for field in saved.files}
+        except (OSError, ValueError):
+            return None
+
+    def load_object(self, key, name):
+        """
+        Load a pickled object (like a spatial index) from a cache entry. Only use this on a cache folder you trust,
+        a pickle can run any code when it is loaded. Prefer store_arrays() for anything that fits in arrays.
+
+        :param key: cache key
+        :param name: name the object was stored under
+        :return: the object, or None if it isn't cached (or can't be read)
+        """
+        path = os.path.join(self._entry_dir(key), f'{name}.pkl')
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def store(self, key, arrays):
+        """
+        Save arrays as a new cache entry. Written to a temporary folder first so a half written entry is never read.
+
+        :param key: cache key
+        :param arrays: dict of name -> array
+        """
+        entry = self._entry_dir(key)
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), np.asarray(array))
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # another process stored the same entry first, and it has the same contents
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def store_arrays(self, key, name, arrays):
+        """
+        Save a group of small arrays (like a fingerprint) into an existing cache entry as one .npz, replacing any
+        stored under the same name.
+
+        :param key: cache key
+        :param name: name to store the arrays under
+        :param arrays: dict of name -> array
+        """
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            return
+        path = os.path.join(entry, f'{name}.npz')
+        tmp = path + f'.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+        self.evict()
+
+    def store_object(self, key, name, obj):
+        """
+        Pickle an object into an existing cache entry.
+
+        :param key: cache key
+        :param name: name to store the object under
+        :param obj: object to pickle
+        """
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            return
+        path = os.path.join(entry, f'{name}.pkl')
+        tmp = path + f'.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def _entries(self):
+        """
+        :return: list of (last used time, size in bytes, folder) for every cache entry
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                # removed by another process while we looked
+                continue
+        return entries
+
+    def size(self):
+        """
+        :return: total size of the cache entries in bytes
+        """
+        return sum(entry[1] for entry in self._entries())
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is under max_bytes.
+        """
+        entries = sorted(self._entries())
+        total = sum(entry[1] for entry in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """
+        Remove every cache entry.
+        """
+        for _, _, entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+_default_cache = None
+
+def get_default_cache():
+    """
+    :return: the ShapeCache shared by every Shape that doesn't pass its own
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ShapeCache()
+    return _default_cache
@@ -0,0 +1,145 @@
+# ------------------------
+# @file     similarity_matrix.py
+# @date     October 2026
+# @author
+# @email
+# @brief    all-pairs distance matrix over a library of stl models, with checkpoints so runs can resume
+# ------------------------
+
+import os
+import sys
+import time
+import argparse
+import functools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from shape import Shape
+from metrics import chamfer_distance
+
+# models kept loaded by each worker process, pairs are handed out row by row so recent models get reused
+_SHAPES_PER_WORKER = 16
+
+@functools.lru_cache(maxsize=_SHAPES_PER_WORKER)
+def _get_shape(stl_file):
+    # progress prints from Shape aren't useful from the workers
+    return Shape(stl_file, verbose=False)
+
+def pair_distance(shape_a, shape_b, levels=3):
+    """
+    Symmetric distance between two shapes. shape_a is registered onto shape_b, then the mean nearest neighbor distance
+    is taken in both directions and averaged.
+
+    :param shape_a: first Shape
+    :param shape_b: second Shape
+    :param levels: pyramid levels used for registration, defaults to 3
+    :return: distance (0 for identical shapes)
+    """
+    result = shape_a.register(shape_b, levels=levels)
+    moved = result.apply(shape_a.point_cloud)
+    # one process per pair already, so no extra threads
+    return chamfer_distance(moved, shape_b, workers=1)/2
+
+def _compare_pair(i, j, file_a, file_b, levels):
+    try:
+        return i, j, pair_distance(_get_shape(file_a), _get_shape(file_b), levels), None
+    except Exception as e:
+        return i, j, np.inf, f'{type(e).__name__}: {e}'
+
+
+def load_checkpoint(checkpoint_file, stl_files):
+    """
+    Load a partial distance matrix, if there is one for the same list of files.
+
+    :param checkpoint_file: location of the checkpoint .npz
+    :param stl_files: list of stl files the matrix is for
+    :return: (n,n) matrix with nan for pairs not done yet
+    """
+    n = len(stl_files)
+    if os.path.isfile(checkpoint_file):
+        saved = np.load(checkpoint_file)
+        if saved['files'].tolist() == list(stl_files):
+            print(f'resuming from {checkpoint_file}')
+            return saved['distances']
+        print(f'{checkpoint_file} is for a different list of files, starting over')
+    distances = np.full((n, n), np.nan)
+    np.fill_diagonal(distances, 0)
+    return distances
+
+def save_matrix(file_name, distances, stl_files):
+    """
+    Save a distance matrix and the files it is for as a .npz. Written to a temporary file first so an interrupted save
+    never leaves a broken checkpoint.
+
+    :param file_name: location of the .npz
+    :param distances: (n,n) distance matrix
+    :param stl_files: list of stl files, in matrix order
+    """
+    tmp = file_name + '.tmp.npz'
+    np.savez(tmp, distances=distances, files=np.array(stl_files))
+    os.replace(tmp, file_name)
+
+def similarity_matrix(stl_files, output_file, workers=None, levels=3, checkpoint_every=10):
+    """
+    Distance between every pair of models in a library. Only the upper triangle is computed and mirrored. Each model
+    is loaded (and cached, see shape_cache.py) once up front so workers can memory map it back in, and pairs are spread
+    over a process pool. Progress is checkpointed to output_file + '.partial.npz' so an interrupted run picks up where
+    it stopped. A pair that fails (like a model with non-finite coordinates) is logged and given an infinite distance,
+    so the rest of the run goes on and a resumed run doesn't retry it.
+
+    :param stl_files: list of stl file locations
+    :param output_file: location of the final .npz with 'distances' and 'files'
+    :param workers: number of processes, defaults to None (one per core)
+    :param levels: pyramid levels used for registration, defaults to 3
+    :param checkpoint_every: save the partial matrix after this many pairs finish, defaults to 10
+    :return: (n,n) distance matrix, inf for pairs that failed
+    """
+    stl_files = list(stl_files)
+    checkpoint_file = output_file + '.partial.npz'
+    distances = load_checkpoint(checkpoint_file, stl_files)
+
+    rows, cols = np.triu_indices(len(stl_files), k=1)
+    todo = [(i, j) for i, j in zip(rows, cols) if np.isnan(distances[i, j])]
+    print(f'{len(todo)} of {rows.shape[0]} pairs left')
+
+    # load every model once so the cache is warm before the workers start
+    for stl_file in stl_files:
+        try:
+            Shape(stl_file, verbose=False)
+        except Exception as e:
+            print(f'could not load {stl_file}: {type(e).__name__}: {e}')
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_compare_pair, i, j, stl_files[i], stl_files[j], levels) for i, j in todo]
+        for future in as_completed(futures):
+            i, j, distance, error = future.result()
+            if error is not None:
+                print(f'{stl_files[i]} vs {stl_files[j]} failed: {error}')
+            distances[i, j] = distance
+            distances[j, i] = distance
+            done += 1
+            if done % checkpoint_every == 0:
+                save_matrix(checkpoint_file, distances, stl_files)
+                print(f'{done}/{len(todo)} pairs done')
+
+    save_matrix(output_file, distances, stl_files)
+    if os.path.isfile(checkpoint_file):
+        os.remove(checkpoint_file)
+    return distances
+
+def main():
+    parser = argparse.ArgumentParser(description='All-pairs distance matrix over a library of stl models.')
+    parser.add_argument('models', nargs='+', help='stl files')
+    parser.add_argument('-o', '--output', default='distance_matrix.npz', help='output .npz (default distance_matrix.npz)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of processes (default one per core)')
+    parser.add_argument('--levels', type=int, default=3, help='registration pyramid levels (default 3)')
+    parser.add_argument('--checkpoint-every', type=int, default=10, help='pairs between checkpoints (default 10)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    distances = similarity_matrix(args.models, args.output, args.workers, args.levels, args.checkpoint_every)
+    print(np.round(distances, 4))
+    print(f'time taken: {time.perf_counter()-start:.2f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
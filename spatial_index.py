@@ -0,0 +1,104 @@
+# ------------------------
+# @file     spatial_index.py
+# @date     October 2026
+# @author
+# @email
+# @brief    KD-tree spatial index for batched nearest neighbor queries on point clouds
+# ------------------------
+
+import numpy as np
+from scipy.spatial import cKDTree
+from topology import group_rows
+
+class SpatialIndex:
+    def __init__(self, points, leafsize=16):
+        """
+        Builds a KD-tree over a point cloud once so it can be queried many times. Every query takes a whole array of
+        points and costs O(log n) per point.
+
+        :param points: numpy array of shape (n,3)
+        :param leafsize: number of points in each leaf of the tree, defaults to 16
+        """
+        self.points = np.asarray(points)
+        self.tree = cKDTree(self.points, leafsize=leafsize)
+
+    def __len__(self):
+        return self.points.shape[0]
+
+    def knn(self, query_points, k=1, max_distance=np.inf, workers=1):
+        """
+        Finds the k nearest neighbors of every query point.
+
+        :param query_points: numpy array of shape (m,3)
+        :param k: number of neighbors to find, defaults to 1
+        :param max_distance: ignore neighbors further than this, defaults to infinity
+        :param workers: number of threads to use, -1 for all cores, defaults to 1
+        :return: distances of shape (m,k) and indices of shape (m,k). Missing neighbors have distance inf and index len(self)
+        """
+        dist, idx = self.tree.query(query_points, k=k, distance_upper_bound=max_distance, workers=workers)
+        return np.reshape(dist, (-1, k)), np.reshape(idx, (-1, k))
+
+    def nearest(self, query_points, max_distance=np.inf, workers=1):
+        """
+        Finds the single nearest neighbor of every query point.
+
+        :param query_points: numpy array of shape (m,3)
+        :param max_distance: ignore neighbors further than this, defaults to infinity
+        :param workers: number of threads to use, -1 for all cores, defaults to 1
+        :return: distances of shape (m,) and indices of shape (m,)
+        """
+        dist, idx = self.knn(query_points, 1, max_distance, workers)
+        return dist[:,0], idx[:,0]
+
+    def nearest_distances(self, query_points, workers=1):
+        """
+        Distance from every query point to the closest point in the index.
+
+        :param query_points: numpy array of shape (m,3)
+        :param workers: number of threads to use, -1 for all cores, defaults to 1
+        :return: distances of shape (m,)
+        """
+        return self.nearest(query_points, workers=workers)[0]
+
+    def radius(self, query_points, r, workers=1):
+        """
+        Finds every point within distance r of each query point.
+
+        :param query_points: numpy array of shape (m,3)
+        :param r: search radius
+        :param workers: number of threads to use, -1 for all cores, defaults to 1
+        :return: list of m arrays of indices
+        """
+        found = self.tree.query_ball_point(query_points, r, workers=workers)
+        return [np.asarray(idx, np.intp) for idx in found]
+
+    def count_in_radius(self, query_points, r, workers=1):
+        """
+        Counts the points within distance r of each query point, without building the index lists.
+
+        :param query_points: numpy array of shape (m,3)
+        :param r: search radius
+        :param workers: number of threads to use, -1 for all cores, defaults to 1
+        :return: counts of shape (m,)
+        """
+        return np.asarray(self.tree.query_ball_point(query_points, r, workers=workers, return_length=True))
+
+def voxel_downsample(points, voxel_size):
+    """
+    Downsamples a point cloud by averaging all the points that fall in the same voxel. Voxels are numbered with a
+    hash table (see topology.group_rows()), so it runs in O(n) expected time without sorting.
+
+    :param points: numpy array of shape (n,3)
+    :param voxel_size: edge length of each voxel
+    :return: numpy array of shape (k,3) with one point per occupied voxel
+    """
+    points = np.asarray(points)
+    if points.shape[0] == 0:
+        return points.copy()
+    first, voxel = group_rows(np.floor(points.reshape(-1, 3)/voxel_size).astype(np.int64))
+    counts = np.bincount(voxel, minlength=first.shape[0])
+
+    downsampled = np.empty((first.shape[0], 3), points.dtype)
+    for axis in range(3):
+        downsampled[:,axis] = np.bincount(voxel, weights=points[:,axis], minlength=first.shape[0])/counts
+    return downsampled
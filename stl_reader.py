@@ -0,0 +1,103 @@
+# ------------------------
+# @file     stl_reader.py
+# @date     October 2026
+# @author
+# @email
+# @brief    memory mapped binary stl reader, no copies of the triangle data
+# ------------------------
+
+import os
+import numpy as np
+
+HEADER_SIZE = 80
+# header + uint32 triangle count
+DATA_OFFSET = HEADER_SIZE + 4
+
+# one 50 byte record per triangle, same layout as numpy-stl's mesh.Mesh.dtype
+STL_DTYPE = np.dtype([
+    ('normals', '<f4', (3,)),
+    ('vectors', '<f4', (3,3)),
+    ('attr', '<u2'),
+])
+
+def is_binary_stl(stl_file):
+    """
+    Checks if a file is a binary stl by comparing the triangle count in the header to the file size.
+    ASCII files (which start with 'solid') won't match.
+
+    :param stl_file: string location of stl file
+    :return: True if the file is a binary stl
+    """
+    size = os.path.getsize(stl_file)
+    if size < DATA_OFFSET:
+        return False
+    with open(stl_file, 'rb') as f:
+        f.seek(HEADER_SIZE)
+        count = int(np.frombuffer(f.read(4), '<u4')[0])
+    return size == DATA_OFFSET + count*STL_DTYPE.itemsize
+
+class BinarySTL:
+    def __init__(self, stl_file):
+        """
+        Opens a binary stl file as a memory map. The triangles, normals and attribute bytes are views into the file, so
+        nothing is read until it is used and nothing is copied.
+
+        :param stl_file: string location of stl file
+        :raises Exception: if the file is not a binary stl
+        """
+        if not is_binary_stl(stl_file):
+            raise Exception(f'{stl_file} is not a binary stl file.')
+
+        self.stl_file = stl_file
+        with open(stl_file, 'rb') as f:
+            self.header = f.read(HEADER_SIZE)
+            self.count = int(np.frombuffer(f.read(4), '<u4')[0])
+
+        if self.count == 0:
+            self.data = np.zeros(0, STL_DTYPE)
+        else:
+            self.data = np.memmap(stl_file, dtype=STL_DTYPE, mode='r', offset=DATA_OFFSET, shape=(self.count,))
+
+    @property
+    def name(self):
+        return self.header.split(b'\0', 1)[0].decode('ascii', errors='replace').strip()
+
+    @property
+    def vectors(self):
+        """(n,3,3) view of the triangle vertices"""
+        return self.data['vectors']
+
+    @property
+    def normals(self):
+        """(n,3) view of the triangle normals"""
+        return self.data['normals']
+
+    @property
+    def attr(self):
+        """(n,) view of the attribute byte counts"""
+        return self.data['attr']
+
+    def __len__(self):
+        return self.count
+
+    def iter_chunks(self, chunk_size=1_000_000):
+        """
+        Goes through the triangles in chunks. Each chunk is a view, so only the pages touched by the current chunk have
+        to be in memory, which works for files larger than RAM.
+
+        :param chunk_size: number of triangles in each chunk, defaults to 1,000,000
+        :yield: structured array views with 'normals', 'vectors' and 'attr' fields
+        """
+        for start in range(0, self.count, chunk_size):
+            yield self.data[start:start+chunk_size]
+
+def iter_stl_chunks(stl_file, chunk_size=1_000_000):
+    """
+    Streams the triangle vectors of a binary stl file in chunks.
+
+    :param stl_file: string location of stl file
+    :param chunk_size: number of triangles in each chunk, defaults to 1,000,000
+    :yield: (k,3,3) views of the triangle vertices
+    """
+    for chunk in BinarySTL(stl_file).iter_chunks(chunk_size):
+        yield chunk['vectors']
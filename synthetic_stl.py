@@ -0,0 +1,133 @@
+# ------------------------
+# @file     synthetic_stl.py
+# @date     October 2026
+# @author
+# @email
+# @brief    generates synthetic stl models with known transforms, noise and local edits for benchmarking
+# ------------------------
+
+import numpy as np
+from stl_reader import STL_DTYPE, HEADER_SIZE
+
+def make_torus(n_faces, major_radius=30, minor_radius=10):
+    """
+    Indexed mesh of a lumpy torus with about n_faces triangles. The lumps make it asymmetric so there is only one
+    correct registration.
+
+    :param n_faces: number of triangles wanted (rounded to fit the grid)
+    :param major_radius: distance from the center to the middle of the tube, defaults to 30
+    :param minor_radius: radius of the tube, defaults to 10
+    :return: vertices of shape (v,3) and faces of shape (f,3) indexing into vertices
+    """
+    quads = max(n_faces//2, 9)
+    nv = max(3, int(round(np.sqrt(quads/3))))
+    nu = max(3, int(round(quads/nv)))
+
+    u, v = np.meshgrid(np.linspace(0, 2*np.pi, nu, endpoint=False), np.linspace(0, 2*np.pi, nv, endpoint=False), indexing='ij')
+    r = minor_radius*(1 + .2*np.sin(3*u)*np.cos(2*v) + .1*np.sin(u) + .1*np.cos(u)*np.cos(v))
+    vertices = np.stack((
+        1.3*(major_radius + r*np.cos(v))*np.cos(u),
+        (major_radius + r*np.cos(v))*np.sin(u),
+        r*np.sin(v) + 2*np.cos(u),
+    ), axis=-1).reshape(-1, 3)
+
+    # two triangles per grid cell, wrapping around in both directions
+    i, j = np.meshgrid(np.arange(nu), np.arange(nv), indexing='ij')
+    i2 = (i+1) % nu
+    j2 = (j+1) % nv
+    a = (i*nv + j).ravel()
+    b = (i2*nv + j).ravel()
+    c = (i2*nv + j2).ravel()
+    d = (i*nv + j2).ravel()
+    faces = np.concatenate((np.stack((a, b, c), axis=1), np.stack((a, c, d), axis=1)))
+    return vertices, faces
+
+def rotation_matrix(angles_deg):
+    """
+    Rotation matrix from x, y, z angles in degrees (applied in that order).
+
+    :param angles_deg: three angles in degrees
+    :return: 3x3 rotation matrix
+    """
+    x, y, z = np.radians(angles_deg)
+    rx = np.array([[1, 0, 0], [0, np.cos(x), -np.sin(x)], [0, np.sin(x), np.cos(x)]])
+    ry = np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]])
+    rz = np.array([[np.cos(z), -np.sin(z), 0], [np.sin(z), np.cos(z), 0], [0, 0, 1]])
+    return rz @ ry @ rx
+
+def local_edit(vertices, center, radius, height):
+    """
+    Pushes the vertices near a point up along z, with a smooth falloff to zero at radius. Acts like a tampered region.
+
+    :param vertices: numpy array of shape (v,3), edited in place
+    :param center: center of the edit, shape (3,)
+    :param radius: vertices further than this are not moved
+    :param height: how far the center vertex moves
+    :return: boolean mask of the vertices that moved
+    """
+    dist = np.linalg.norm(vertices-center, axis=1)
+    edited = dist < radius
+    vertices[edited, 2] += height*(1 - dist[edited]/radius)**2
+    return edited
+
+def write_binary_stl(stl_file, vectors, name='synthetic'):
+    """
+    Writes triangles to a binary stl file, with normals calculated from the vertices.
+
+    :param stl_file: string location to write to
+    :param vectors: numpy array of shape (n,3,3)
+    :param name: name put in the header, defaults to 'synthetic'
+    """
+    data = np.zeros(vectors.shape[0], STL_DTYPE)
+    data['vectors'] = vectors
+    normals = np.cross(vectors[:,1]-vectors[:,0], vectors[:,2]-vectors[:,0])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    data['normals'] = np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+
+    with open(stl_file, 'wb') as f:
+        f.write(name.encode('ascii')[:HEADER_SIZE].ljust(HEADER_SIZE, b'\0'))
+        f.write(np.uint32(vectors.shape[0]).tobytes())
+        data.tofile(f)
+
+def generate_case(reference_file, candidate_file, n_faces, seed=0, rotation_deg=(4, -3, 6), translation=(1, -2, .5),
+                  noise=0.0, edits=1, edit_radius=5, edit_height=2):
+    """
+    Writes a reference model and a tampered, moved copy of it. The copy gets localized edits, then gaussian noise on
+    every vertex, then a rigid transform. Everything is seeded so the same arguments always give the same files.
+
+    :param reference_file: string location to write the reference to
+    :param candidate_file: string location to write the candidate to
+    :param n_faces: number of triangles wanted
+    :param seed: random seed, defaults to 0
+    :param rotation_deg: x, y, z rotation of the candidate in degrees, defaults to (4, -3, 6)
+    :param translation: translation of the candidate, defaults to (1, -2, .5)
+    :param noise: standard deviation of the noise, defaults to 0
+    :param edits: number of local edits, defaults to 1
+    :param edit_radius: radius of each edit, defaults to 5
+    :param edit_height: height of each edit, defaults to 2
+    :return: dict with the face count, 4x4 transform applied to the candidate, and number of edited vertices
+    """
+    rng = np.random.default_rng(seed)
+    vertices, faces = make_torus(n_faces)
+    write_binary_stl(reference_file, vertices[faces].astype(np.float32), 'reference')
+
+    moved = vertices.copy()
+    edited = np.zeros(vertices.shape[0], bool)
+    for center in vertices[rng.choice(vertices.shape[0], edits, replace=False)]:
+        edited |= local_edit(moved, center, edit_radius, edit_height)
+    if noise > 0:
+        moved += rng.normal(scale=noise, size=moved.shape)
+
+    rotation = rotation_matrix(rotation_deg)
+    moved = moved @ rotation.T + np.asarray(translation)
+    write_binary_stl(candidate_file, moved[faces].astype(np.float32), 'candidate')
+
+    transform = np.eye(4)
+    transform[:3,:3] = rotation
+    transform[:3,3] = translation
+    return {
+        'faces': int(faces.shape[0]),
+        'vertices': int(vertices.shape[0]),
+        'transform': transform.tolist(),
+        'edited_vertices': int(np.count_nonzero(edited)),
+    }
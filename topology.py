@@ -0,0 +1,304 @@
+# ------------------------
+# @file     topology.py
+# @date     October 2026
+# @author
+# @email
+# @brief    vertex welding, mesh connectivity from face arrays, connected components, and locating regions that deviate
+# ------------------------
+
+import numpy as np
+
+# odd 64 bit constants for mixing coordinates into a hash
+_HASH_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+# the 13 neighboring grid cells with a larger key, so every pair of neighboring cells is checked once
+_NEIGHBOR_OFFSETS = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)
+                              if (i, j, k) > (0, 0, 0)], np.int64)
+
+class _RowHashTable:
+    def __init__(self, keys):
+        """
+        Open addressing hash table over rows of 3 int64 keys, built and searched for all rows at once. Every round of
+        linear probing is one vectorized pass over the rows that haven't found their slot yet, so building is O(n)
+        expected at a load factor of 1/2.
+
+        :param keys: numpy array of shape (n,3) of int64
+        """
+        self.keys = keys
+        n = keys.shape[0]
+        self.mask = (1 << int(np.ceil(np.log2(max(2*n, 2))))) - 1
+        self.table = np.full(self.mask+1, n, np.int64)   # n marks an empty slot
+
+        # first[i] is the smallest row with the same key as row i
+        self.first = np.empty(n, np.int64)
+        pending = np.arange(n)
+        slot = self._hash(keys)
+        while pending.shape[0] > 0:
+            empty = self.table[slot] == n
+            # rows with equal keys probe the same slots together, so the smallest of them claims the slot
+            np.minimum.at(self.table, slot[empty], pending[empty])
+            owner = self.table[slot]
+            found = np.all(keys[owner] == keys[pending], axis=1)
+            self.first[pending[found]] = owner[found]
+            pending = pending[~found]
+            slot = (slot[~found]+1) & self.mask
+
+    def _hash(self, keys):
+        h = np.zeros(keys.shape[0], np.uint64)
+        for axis in range(3):
+            h ^= keys[:,axis].astype(np.uint64)
+            h *= np.uint64(_HASH_MULTIPLIERS[axis])
+            h ^= h >> np.uint64(29)
+        return (h & np.uint64(self.mask)).astype(np.int64)
+
+    def find(self, queries):
+        """
+        :param queries: numpy array of shape (q,3) of int64
+        :return: smallest row with the same key as each query, -1 where there is none
+        """
+        n = self.keys.shape[0]
+        result = np.full(queries.shape[0], -1, np.int64)
+        pending = np.arange(queries.shape[0])
+        slot = self._hash(queries)
+        while pending.shape[0] > 0:
+            owner = self.table[slot]
+            occupied = owner != n
+            found = occupied.copy()
+            found[occupied] = np.all(self.keys[owner[occupied]] == queries[pending[occupied]], axis=1)
+            result[pending[found]] = owner[found]
+            # keep probing past other keys, stop at an empty slot
+            more = occupied & ~found
+            pending = pending[more]
+            slot = (slot[more]+1) & self.mask
+        return result
+
+def group_rows(keys):
+    """
+    Numbers the distinct rows of keys in order of first appearance, in O(n) expected time with a hash table instead
+    of sorting like np.unique(axis=0).
+
+    :param keys: numpy array of shape (n,3) of int64, or a _RowHashTable already built over it
+    :return: first row of every group of shape (k,), and the group of every row of shape (n,)
+    """
+    table = keys if isinstance(keys, _RowHashTable) else _RowHashTable(keys)
+    n = table.first.shape[0]
+    first = np.flatnonzero(table.first == np.arange(n))
+    group = np.empty(n, np.int64)
+    group[first] = np.arange(first.shape[0])
+    return first, group[table.first]
+
+def weld_vertices(points, eps=None):
+    """
+    Merges duplicate vertices in O(n) expected time with a hash table (instead of sorting rows like
+    np.unique(axis=0)). With eps, vertices are snapped to a grid of size eps and vertices in the same cell are merged.
+    Cells next to each other are merged too when their first vertices are within eps, so vertices that differ by float
+    noise are welded even when they land on opposite sides of a cell boundary.
+
+    :param points: numpy array of shape (n,3)
+    :param eps: weld distance, defaults to None (only exactly equal vertices)
+    :return: welded vertices of shape (k,3) in order of first appearance, and the welded vertex of every point of shape (n,)
+    """
+    points = np.reshape(points, (-1, 3))
+    if eps:
+        keys = np.floor(points/eps).astype(np.int64)
+    else:
+        # bit patterns of the coordinates, adding 0 turns -0.0 into 0.0 so they match like == does
+        keys = (points.astype(np.float64) + 0.0).view(np.int64)
+    table = _RowHashTable(keys)
+    cell_first, cell_id = group_rows(table)
+
+    if not eps:
+        return points[cell_first], cell_id
+
+    # join neighboring cells whose first vertices are within eps
+    pairs = []
+    cell_keys = keys[cell_first]
+    cell_points = points[cell_first].astype(np.float64)
+    for offset in _NEIGHBOR_OFFSETS:
+        neighbor = table.find(cell_keys + offset)
+        has = np.flatnonzero(neighbor >= 0)
+        neighbor = cell_id[neighbor[has]]
+        diff = cell_points[has]-cell_points[neighbor]
+        close = np.einsum('ij,ij->i', diff, diff) <= eps*eps
+        pairs.append(np.stack((has[close], neighbor[close]), axis=1))
+    labels = connected_components(cell_first.shape[0], np.concatenate(pairs))
+
+    # labels are numbered by their smallest cell, which is also the order of first appearance
+    _, label_first = np.unique(labels, return_index=True)
+    return points[cell_first[label_first]], labels[cell_id]
+
+def index_faces(vectors, eps=None):
+    """
+    Turns a triangle soup into an indexed mesh: a list of unique vertices and, for every face, the indices of its 3
+    vertices. See weld_vertices().
+
+    :param vectors: numpy array of shape (m,3,3)
+    :param eps: weld distance, defaults to None (only exactly equal vertices)
+    :return: vertices of shape (k,3), faces of shape (m,3) indexing into vertices
+    """
+    vertices, index = weld_vertices(vectors, eps)
+    return vertices, index.reshape(-1, 3)
+
+def face_edges(faces):
+    """
+    Every edge of every face as a single int64 key (smaller vertex * n + larger vertex), so edges shared by faces get
+    the same key no matter which way round the faces list them.
+
+    :param faces: numpy array of shape (m,3) of vertex indices
+    :return: keys of shape (3m,), ordered face 0 edges, face 1 edges, ...
+    """
+    faces = np.asarray(faces, np.int64)
+    n = np.max(faces)+1 if faces.size else 0
+    start = faces
+    end = np.roll(faces, -1, axis=1)
+    return (np.minimum(start, end)*n + np.maximum(start, end)).ravel()
+
+def is_closed(faces):
+    """
+    Whether an indexed mesh is watertight, every edge shared by exactly 2 faces. Open scans, holes and non-manifold
+    edges all fail, and those don't enclose a volume, so their mass properties mean nothing.
+
+    :param faces: numpy array of shape (m,3) of vertex indices
+    :return: True if the mesh is closed
+    """
+    faces = np.asarray(faces)
+    if faces.size == 0:
+        return False
+    _, counts = np.unique(face_edges(faces), return_counts=True)
+    return bool(np.all(counts == 2))
+
+def vertex_adjacency(faces):
+    """
+    Pairs of vertices joined by an edge, each edge once.
+
+    :param faces: numpy array of shape (m,3) of vertex indices
+    :return: numpy array of shape (e,2)
+    """
+    faces = np.asarray(faces, np.int64)
+    if faces.size == 0:
+        return np.empty((0, 2), np.int64)
+    n = np.max(faces)+1
+    keys = np.unique(face_edges(faces))
+    return np.stack((keys//n, keys%n), axis=1)
+
+def face_adjacency(faces):
+    """
+    Pairs of faces that share an edge. Edge keys are sorted so faces with the same edge end up next to each other,
+    then neighbors in the sorted order are paired (an edge shared by more than 2 faces links them in a chain).
+
+    :param faces: numpy array of shape (m,3) of vertex indices
+    :return: numpy array of shape (p,2)
+    """
+    keys = face_edges(faces)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    shared = np.flatnonzero(keys[1:] == keys[:-1])
+    face = order//3
+    return np.stack((face[shared], face[shared+1]), axis=1)
+
+def connected_components(n, pairs):
+    """
+    Labels the connected components of a graph with a vectorized union-find. Every round hooks the root of each
+    edge's larger side onto the smaller root, then flattens the trees by pointer jumping until every node points
+    straight at its root. Each round at least halves the number of roots touching an unfinished edge, so it takes a
+    few rounds of linear work.
+
+    :param n: number of nodes
+    :param pairs: numpy array of shape (p,2) of connected nodes
+    :return: component labels of shape (n,), numbered 0 to k-1 in order of their smallest node
+    """
+    parent = np.arange(n)
+    pairs = np.asarray(pairs, np.int64).reshape(-1, 2)
+    a, b = pairs[:,0], pairs[:,1]
+    while a.shape[0] > 0:
+        root_a = parent[a]
+        root_b = parent[b]
+        # only edges that still join two different trees matter
+        open_edges = root_a != root_b
+        a, b = a[open_edges], b[open_edges]
+        root_a, root_b = root_a[open_edges], root_b[open_edges]
+        if a.shape[0] == 0:
+            break
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        # pointer jumping
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    _, labels = np.unique(parent, return_inverse=True)
+    return labels.ravel()
+
+def label_regions(faces, vertex_mask):
+    """
+    Groups flagged vertices into regions: two flagged vertices are in the same region if they are joined by a path of
+    mesh edges through flagged vertices. A face belongs to the region of its flagged vertices.
+
+    :param faces: numpy array of shape (m,3) of vertex indices
+    :param vertex_mask: boolean array of shape (n,), True for flagged vertices
+    :return: region label of every vertex of shape (n,) and every face of shape (m,), -1 where not flagged
+    """
+    faces = np.asarray(faces)
+    vertex_mask = np.asarray(vertex_mask, bool)
+    flagged = np.flatnonzero(vertex_mask)
+    vertex_labels = np.full(vertex_mask.shape[0], -1, np.intp)
+    face_labels = np.full(faces.shape[0], -1, np.intp)
+    if flagged.shape[0] == 0:
+        return vertex_labels, face_labels
+
+    # graph over flagged vertices only
+    edges = vertex_adjacency(faces)
+    edges = edges[vertex_mask[edges[:,0]] & vertex_mask[edges[:,1]]]
+    compact = np.full(vertex_mask.shape[0], -1, np.int64)
+    compact[flagged] = np.arange(flagged.shape[0])
+    vertex_labels[flagged] = connected_components(flagged.shape[0], compact[edges])
+
+    # flagged vertices of a face are joined by its edges, so any of them gives the face's label
+    face_labels = np.max(vertex_labels[faces], axis=1)
+    return vertex_labels, face_labels
+
+def region_statistics(vertices, faces, vertex_labels, face_labels, deviations=None, areas=None):
+    """
+    Size and location of each labelled region.
+
+    :param vertices: numpy array of shape (n,3)
+    :param faces: numpy array of shape (m,3) of vertex indices
+    :param vertex_labels: region of every vertex, -1 for none, see label_regions()
+    :param face_labels: region of every face, -1 for none
+    :param deviations: deviation of every vertex of shape (n,), defaults to None
+    :param areas: area of every face of shape (m,), defaults to None
+    :return: list of dicts with label, vertices, faces, area, max_deviation, bbox_min and bbox_max, largest first
+    """
+    count = np.max(vertex_labels, initial=-1)+1
+    if count == 0:
+        return []
+    flagged = vertex_labels >= 0
+    labels = vertex_labels[flagged]
+    points = vertices[flagged]
+
+    vertex_count = np.bincount(labels, minlength=count)
+    face_count = np.bincount(face_labels[face_labels >= 0], minlength=count)
+    bbox_min = np.full((count, 3), np.inf)
+    bbox_max = np.full((count, 3), -np.inf)
+    np.minimum.at(bbox_min, labels, points)
+    np.maximum.at(bbox_max, labels, points)
+    area = None
+    if areas is not None:
+        area = np.bincount(face_labels[face_labels >= 0], weights=areas[face_labels >= 0], minlength=count)
+    max_deviation = None
+    if deviations is not None:
+        max_deviation = np.zeros(count)
+        np.maximum.at(max_deviation, labels, deviations[flagged])
+
+    regions = []
+    for label in np.argsort(-vertex_count, kind='stable'):
+        regions.append({
+            'label': int(label),
+            'vertices': int(vertex_count[label]),
+            'faces': int(face_count[label]),
+            'area': None if area is None else float(area[label]),
+            'max_deviation': None if max_deviation is None else float(max_deviation[label]),
+            'bbox_min': bbox_min[label].tolist(),
+            'bbox_max': bbox_max[label].tolist(),
+        })
+    return regions
@@ -8,6 +8,7 @@
 
 import numpy as np
 import math
+from spatial_index import SpatialIndex
 
 class Triangle:
     def __init__(self, verts=[]):
@@ -19,6 +20,21 @@ class Triangle:
         self.set_vertices(verts)
         self.edges = self.calculate_edge_lengths()
         self.area = self.calculate_area_of_triangle()
+
+    @classmethod
+    def from_mesh(cls, triangle_mesh, index):
+        """
+        Create a triangle that is a view onto one row of a TriangleMesh. Edges and area are taken from the mesh arrays instead of being recalculated.
+
+        :param triangle_mesh: TriangleMesh to take the face from
+        :param index: index of the face in the mesh
+        :return: Triangle sharing its vertices with the mesh
+        """
+        triangle = cls.__new__(cls)
+        triangle.vertices = triangle_mesh.vectors[index]
+        triangle.edges = triangle_mesh.edges[index]
+        triangle.area = triangle_mesh.areas[index]
+        return triangle
     
     def set_vertices(self, verts=[]):
         """
@@ -178,6 +194,231 @@ class Triangle:
         return f'{self.vertices} \narea: {self.area} \nedge lengths: {self.edges}'
 
 
+class TriangleMesh:
+    def __init__(self, vectors, dtype=np.float64):
+        """
+        Struct-of-arrays version of a list of Triangles. Edge lengths, areas, normals and centroids are computed for every face at once.
+
+        :param vectors: numpy array of shape (n,3,3), like model_mesh.data['vectors']
+        :param dtype: float type to compute and keep the face properties in, defaults to np.float64
+        :raises Exception: if vectors is not the right size
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 3 or vectors.shape[1:] != (3,3):
+            raise Exception('Your numpy array is not the right size. Must be (n,3,3)')
+
+        self.vectors = vectors     # vertices of each face, no copy is made
+        self.edges = None          # (n,3) edge lengths, same order as Triangle.edges
+        self.areas = None          # (n,) area of each face
+        self.normals = None        # (n,3) unit normal of each face
+        self.centroids = None      # (n,3) center of each face
+        self._centroid_index = None
+
+        self.calculate_properties(dtype)
+
+    @classmethod
+    def from_arrays(cls, vectors, edges, areas, normals, centroids):
+        """
+        Create a TriangleMesh from properties that were already calculated (like ones loaded from a cache).
+
+        :param vectors: (n,3,3) vertices of each face
+        :param edges: (n,3) edge lengths
+        :param areas: (n,) areas
+        :param normals: (n,3) unit normals
+        :param centroids: (n,3) centers
+        :return: TriangleMesh
+        """
+        triangle_mesh = cls.__new__(cls)
+        triangle_mesh.vectors = vectors
+        triangle_mesh.edges = edges
+        triangle_mesh.areas = areas
+        triangle_mesh.normals = normals
+        triangle_mesh.centroids = centroids
+        triangle_mesh._centroid_index = None
+        return triangle_mesh
+
+    def calculate_properties(self, dtype=np.float64):
+        """
+        Calculates edge lengths, areas, unit normals and centroids for all faces in one pass.
+        Degenerate faces get a normal of zeros.
+
+        :param dtype: float type to compute in, defaults to np.float64
+        """
+        v1 = self.vectors[:,0].astype(dtype)
+        v2 = self.vectors[:,1].astype(dtype)
+        v3 = self.vectors[:,2].astype(dtype)
+
+        e12 = v2-v1
+        e13 = v3-v1
+        e23 = v3-v2
+
+        # edge[0]=v1 to v2, edge[1]=v1 to v3, edge[2]=v2 to v3
+        self.edges = np.sqrt(np.stack((
+            np.einsum('ij,ij->i', e12, e12),
+            np.einsum('ij,ij->i', e13, e13),
+            np.einsum('ij,ij->i', e23, e23),
+        ), axis=1))
+
+        # cross product gives both the normal direction and twice the area
+        cross = np.cross(e12, e13)
+        double_area = np.sqrt(np.einsum('ij,ij->i', cross, cross))
+        self.areas = double_area/2
+
+        self.normals = np.zeros_like(cross)
+        nonzero = double_area > 0
+        self.normals[nonzero] = cross[nonzero]/double_area[nonzero,None]
+
+        v1 += v2
+        v1 += v3
+        v1 /= 3
+        self.centroids = v1
+        self._centroid_index = None
+
+    def get_centroid_index(self):
+        """
+        Get a spatial index over the face centroids, for finding candidate faces near a point. Built once and reused.
+
+        :return: SpatialIndex of centroids
+        """
+        if self._centroid_index is None:
+            self._centroid_index = SpatialIndex(self.centroids)
+        return self._centroid_index
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def __getitem__(self, index):
+        return Triangle.from_mesh(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __str__(self):
+        return f'{len(self)} triangles \ntotal area: {np.sum(self.areas)}'
+
+
+def closest_points_on_triangles(points, triangles):
+    """
+    Finds the closest point on each triangle to the matching point. Points and triangles are paired by row, so
+    points[i] is checked against triangles[i]. Uses the voronoi region method from Ericson's Real-Time Collision Detection.
+
+    :param points: numpy array of shape (n,3)
+    :param triangles: numpy array of shape (n,3,3)
+    :return: closest points of shape (n,3) and barycentric coordinates of those points of shape (n,3)
+    """
+    points = np.asarray(points, np.float64)
+    a = triangles[:,0].astype(np.float64)
+    b = triangles[:,1].astype(np.float64)
+    c = triangles[:,2].astype(np.float64)
+
+    ab = b-a
+    ac = c-a
+    ap = points-a
+    bp = points-b
+    cp = points-c
+
+    d1 = np.einsum('ij,ij->i', ab, ap)
+    d2 = np.einsum('ij,ij->i', ac, ap)
+    d3 = np.einsum('ij,ij->i', ab, bp)
+    d4 = np.einsum('ij,ij->i', ac, bp)
+    d5 = np.einsum('ij,ij->i', ab, cp)
+    d6 = np.einsum('ij,ij->i', ac, cp)
+
+    va = d3*d6 - d5*d4
+    vb = d5*d2 - d1*d6
+    vc = d1*d4 - d3*d2
+
+    bary = np.empty((points.shape[0], 3))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # inside face region, default for everything
+        denom = va + vb + vc
+        denom = np.where(denom == 0, 1, denom)
+        v = vb/denom
+        w = vc/denom
+        bary[:,0] = 1-v-w
+        bary[:,1] = v
+        bary[:,2] = w
+
+        # regions are written lowest priority first so vertex regions win ties
+        # edge bc
+        mask = (va <= 0) & ((d4-d3) >= 0) & ((d5-d6) >= 0)
+        w = (d4-d3)/((d4-d3) + (d5-d6))
+        bary[mask] = np.stack((np.zeros_like(w), 1-w, w), axis=1)[mask]
+        # edge ac
+        mask = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        w = d2/(d2-d6)
+        bary[mask] = np.stack((1-w, np.zeros_like(w), w), axis=1)[mask]
+        # vertex c
+        mask = (d6 >= 0) & (d5 <= d6)
+        bary[mask] = (0,0,1)
+        # edge ab
+        mask = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        v = d1/(d1-d3)
+        bary[mask] = np.stack((1-v, v, np.zeros_like(v)), axis=1)[mask]
+        # vertex b
+        mask = (d3 >= 0) & (d4 <= d3)
+        bary[mask] = (0,1,0)
+        # vertex a
+        mask = (d1 <= 0) & (d2 <= 0)
+        bary[mask] = (1,0,0)
+
+    # degenerate triangles can still leave nan behind, fall back to vertex a
+    bad = ~np.isfinite(bary).all(1)
+    bary[bad] = (1,0,0)
+
+    closest = bary[:,0,None]*a + bary[:,1,None]*b + bary[:,2,None]*c
+    return closest, bary
+
+def points_to_triangles(points, triangles, candidates=None, tol=1e-6, chunk_size=1_000_000):
+    """
+    Finds the closest triangle and true euclidean distance to it for every point. Work is done in chunks so that at most
+    chunk_size point/triangle pairs are held in memory at once.
+
+    :param points: numpy array of shape (n,3)
+    :param triangles: TriangleMesh or numpy array of shape (m,3,3)
+    :param candidates: optional (n,k) array of face indices to check for each point, defaults to None (check all faces)
+    :param tol: distance at which a point is considered to be in a triangle, defaults to 1e-6
+    :param chunk_size: max number of point/triangle pairs per chunk, defaults to 1,000,000
+    :return: distances of shape (n,), index of closest face of shape (n,), and whether each point is in its closest face
+    """
+    if isinstance(triangles, TriangleMesh):
+        triangles = triangles.vectors
+    points = np.asarray(points)
+    n = points.shape[0]
+    m = triangles.shape[0]
+
+    if candidates is None:
+        k = m
+    else:
+        candidates = np.asarray(candidates).reshape(n, -1)
+        k = candidates.shape[1]
+
+    distances = np.full(n, np.inf)
+    closest_face = np.full(n, -1, np.intp)
+    if n == 0 or m == 0 or k == 0:
+        return distances, closest_face, np.zeros(n, bool)
+
+    rows = max(1, chunk_size//k)
+    for start in range(0, n, rows):
+        stop = min(start+rows, n)
+        if candidates is None:
+            faces = np.broadcast_to(np.arange(m), (stop-start, m))
+        else:
+            faces = candidates[start:stop]
+
+        pairs_points = np.repeat(points[start:stop], k, axis=0)
+        closest, _ = closest_points_on_triangles(pairs_points, triangles[faces.ravel()])
+        diff = closest-pairs_points
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff)).reshape(stop-start, k)
+
+        best = np.argmin(dist, axis=1)
+        distances[start:stop] = dist[np.arange(stop-start), best]
+        closest_face[start:stop] = faces[np.arange(stop-start), best]
+
+    return distances, closest_face, distances <= tol
+
+
 # # ----- testing ------
 # test = np.array([[1,1,1],[4,3,3],[2,5,5]])
 # # print(test.shape, test)
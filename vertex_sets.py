@@ -0,0 +1,118 @@
+# ------------------------
+# @file     vertex_sets.py
+# @date     October 2026
+# @author
+# @email
+# @brief    set operations (intersection, difference, union) on lists of vertices
+# ------------------------
+
+import numpy as np
+
+def vertex_keys(cloud, eps=None):
+    """
+    Turns every vertex into a single sortable key. With no eps the raw coordinates are used, so only exactly equal
+    vertices share a key. With eps, coordinates are snapped to a grid of size eps first.
+
+    :param cloud: numpy array of shape (n,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :return: numpy array of shape (n,) of void keys
+    """
+    cloud = np.asarray(cloud)
+    if eps:
+        keys = np.floor(cloud/eps).astype(np.int64)
+    else:
+        # adding 0 turns -0.0 into 0.0 so they hash the same, like == does
+        keys = cloud.astype(np.float64) + 0.0
+    keys = np.ascontiguousarray(keys.reshape(-1, 3))
+    return keys.view(np.dtype((np.void, keys.dtype.itemsize*3))).ravel()
+
+def vertex_ids(cloud_a, cloud_b, eps=None):
+    """
+    Gives every vertex of both clouds an integer id, where equal vertices (in either cloud) get the same id.
+    Runs in O((n+m) log(n+m)) by sorting the keys once.
+
+    :param cloud_a: numpy array of shape (n,3)
+    :param cloud_b: numpy array of shape (m,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :return: ids of cloud_a of shape (n,), ids of cloud_b of shape (m,)
+    """
+    keys_a = vertex_keys(cloud_a, eps)
+    keys_b = vertex_keys(cloud_b, eps)
+    _, ids = np.unique(np.concatenate((keys_a, keys_b)), return_inverse=True)
+    ids = ids.ravel()
+    return ids[:keys_a.shape[0]], ids[keys_a.shape[0]:]
+
+def isin_vertices(cloud_a, cloud_b, eps=None):
+    """
+    Checks which vertices of cloud_a are also in cloud_b. Same as (vert==cloud_b).all(1).any() for every vertex.
+
+    :param cloud_a: numpy array of shape (n,3)
+    :param cloud_b: numpy array of shape (m,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :return: boolean array of shape (n,)
+    """
+    ids_a, ids_b = vertex_ids(cloud_a, cloud_b, eps)
+    return np.isin(ids_a, ids_b)
+
+def intersect_vertices(cloud_a, cloud_b, eps=None):
+    """
+    Vertices of cloud_a that are also in cloud_b, in the order of cloud_a.
+
+    :param cloud_a: numpy array of shape (n,3)
+    :param cloud_b: numpy array of shape (m,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :return: numpy array of shared vertices
+    """
+    cloud_a = np.asarray(cloud_a)
+    return cloud_a[isin_vertices(cloud_a, cloud_b, eps)]
+
+def difference_vertices(cloud_a, cloud_b, eps=None):
+    """
+    Vertices of cloud_a that are not in cloud_b, in the order of cloud_a.
+
+    :param cloud_a: numpy array of shape (n,3)
+    :param cloud_b: numpy array of shape (m,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :return: numpy array of vertices only in cloud_a
+    """
+    cloud_a = np.asarray(cloud_a)
+    return cloud_a[~isin_vertices(cloud_a, cloud_b, eps)]
+
+def union_vertices(cloud_a, cloud_b, eps=None):
+    """
+    Every distinct vertex from either cloud. The first vertex seen (cloud_a before cloud_b) is kept for each key.
+
+    :param cloud_a: numpy array of shape (n,3)
+    :param cloud_b: numpy array of shape (m,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :return: numpy array of distinct vertices
+    """
+    both = np.concatenate((np.asarray(cloud_a).reshape(-1, 3), np.asarray(cloud_b).reshape(-1, 3)))
+    _, first = np.unique(vertex_keys(both, eps), return_index=True)
+    return both[np.sort(first)]
+
+def count_shared_vertices(cloud_a, cloud_b, eps=None, multiset=False):
+    """
+    Counts the vertices shared between two clouds and the total number of distinct vertices across both.
+
+    By default every vertex of cloud_a found anywhere in cloud_b counts as shared, and the total is the size of cloud_a
+    plus the vertices of cloud_b not in cloud_a. With multiset, each vertex of cloud_b can only be matched once
+    (like removing it from a list when it is found).
+
+    :param cloud_a: numpy array of shape (n,3)
+    :param cloud_b: numpy array of shape (m,3)
+    :param eps: grid size to quantize to, defaults to None (exact)
+    :param multiset: whether each vertex of cloud_b can only be matched once, defaults to False
+    :return: number of shared vertices, total number of vertices
+    """
+    ids_a, ids_b = vertex_ids(cloud_a, cloud_b, eps)
+    if multiset:
+        size = max(ids_a.max(initial=-1), ids_b.max(initial=-1)) + 1
+        count_a = np.bincount(ids_a, minlength=size)
+        count_b = np.bincount(ids_b, minlength=size)
+        shared = int(np.sum(np.minimum(count_a, count_b)))
+        return shared, ids_a.shape[0] + ids_b.shape[0] - shared
+
+    shared = int(np.count_nonzero(np.isin(ids_a, ids_b)))
+    total = ids_a.shape[0] + int(np.count_nonzero(~np.isin(ids_b, ids_a)))
+    return shared, total